@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+audio_service.py - Background text-to-speech playback
+
+One thread owns the pygame mixer for the lifetime of the application. Utterances
+are queued, synthesized into in-memory buffers (or read from the clip cache)
+and played one after another; the GUI only enqueues and never waits for speech.
+Long texts are split into sentences that are synthesized in parallel ahead of
+playback, so speech starts once the first sentence is ready. The thread (and
+pygame) only start with the first utterance or pre-warm, not at startup.
+"""
+
+import io
+import re
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from tts_backends import TTSRouter
+from tts_cache import ClipCache, make_clip_key
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05  # Seconds between playback state checks
+PIPELINE_ENABLED = True
+PIPELINE_MIN_CHARS = 120  # Shorter texts are synthesized in one piece
+PIPELINE_WORKERS = 3  # Sentences synthesized ahead of playback
+MIN_SENTENCE_CHARS = 25  # Shorter sentences are joined with the next one
+
+
+class Utterance(NamedTuple):
+    text: str
+    lang: str
+    volume: float
+    generation: int  # Utterances queued before the last stop() are dropped
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence ends and line breaks, joining very short sentences to the next"""
+    pieces = [piece.strip() for piece in re.split(r"(?<=[.!?…:;])\s+|\n+", text) if piece.strip()]
+    sentences = []
+    pending = ""
+    for piece in pieces:
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class AudioService:
+    """Queue of utterances played in order on a dedicated audio thread"""
+
+    def __init__(self, tts: Optional[TTSRouter] = None, clip_cache: Optional[ClipCache] = None):
+        self.tts = tts if tts is not None else TTSRouter()
+        self.clip_cache = clip_cache
+        self._queue: "queue.Queue[Optional[Utterance]]" = queue.Queue()
+        self._generation = 0
+        self._skip = threading.Event()
+        self._lock = threading.Lock()
+        self._synthesis_pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="tts")
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+
+    def start(self):
+        """Start the audio thread if it is not running yet"""
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def speak(self, text: str, lang: str = "en", volume: float = 1.0):
+        """Queue text to be spoken after anything already queued"""
+        if not text or not text.strip():
+            return
+        with self._lock:
+            generation = self._generation
+        self._queue.put(Utterance(text, lang, min(1.0, max(0.0, volume)), generation))
+        self.start()
+
+    def prewarm(self, phrases: Iterable[Tuple[str, str]]):
+        """Synthesize (text, lang) pairs missing from the clip cache on a background thread"""
+        self.start()
+        if self.clip_cache is None:
+            return
+        phrases = list(phrases)
+
+        def warm():
+            synthesized = 0
+            for text, lang in phrases:
+                voice = self.tts.voice(lang)
+                if self.clip_cache.contains(make_clip_key(text, lang, voice)):
+                    continue
+                try:
+                    audio, used_voice = self.tts.synthesize(text, lang)
+                except Exception as e:
+                    logger.warning(f"Could not pre-warm voice clip: {e}")
+                    return
+                if used_voice != voice:
+                    # Most likely offline; the phrase is synthesized when first spoken instead
+                    logger.warning(f"Stopped pre-warming voice clips, {voice} is unavailable")
+                    return
+                self.clip_cache.set(make_clip_key(text, lang, voice), audio)
+                synthesized += 1
+            logger.info(f"Voice clips pre-warmed: {synthesized} synthesized, "
+                        f"{len(phrases) - synthesized} already cached")
+
+        threading.Thread(target=warm, name="audio-prewarm", daemon=True).start()
+
+    def skip(self):
+        """Stop the utterance being played and continue with the next one"""
+        self._skip.set()
+
+    def stop(self):
+        """Stop playback and drop every queued utterance"""
+        with self._lock:
+            self._generation += 1
+        self._skip.set()
+
+    def shutdown(self):
+        """Stop playback and end the audio thread"""
+        self.stop()
+        if self._thread.ident is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=2)
+        self._synthesis_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _current_generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _run(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+        except Exception as e:
+            logger.error(f"Audio disabled, mixer could not be initialized: {e}")
+            return
+
+        while True:
+            utterance = self._queue.get()
+            if utterance is None:
+                break
+            if utterance.generation != self._current_generation():
+                continue
+            self._skip.clear()
+            self._speak(utterance)
+
+        pygame.mixer.quit()
+
+    def _interrupted(self, utterance: Utterance) -> bool:
+        return utterance.generation != self._current_generation() or self._skip.is_set()
+
+    def _pieces(self, text: str, lang: str) -> List[str]:
+        """Split a long text into sentences unless it is short or already cached whole"""
+        if not PIPELINE_ENABLED or len(text) < PIPELINE_MIN_CHARS:
+            return [text]
+        if self.clip_cache is not None and self.clip_cache.contains(make_clip_key(text, lang, self.tts.voice(lang))):
+            return [text]
+        return split_sentences(text) or [text]
+
+    def _speak(self, utterance: Utterance):
+        """Synthesize an utterance's sentences ahead in parallel and play them in order"""
+        pieces = self._pieces(utterance.text, utterance.lang)
+        futures = [self._synthesis_pool.submit(self._clip, piece, utterance.lang) for piece in pieces]
+        try:
+            for future in futures:
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    logger.error(f"Error synthesizing voice: {e}")
+                    continue
+                # stop() or skip() may have been called while synthesizing
+                if self._interrupted(utterance):
+                    break
+                self._play(audio, utterance.volume)
+                if self._interrupted(utterance):
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _clip(self, text: str, lang: str) -> bytes:
+        """Return the audio of text from the clip cache, synthesizing and storing it on a miss"""
+        if self.clip_cache is None:
+            return self.tts.synthesize(text, lang)[0]
+        audio = self.clip_cache.get(make_clip_key(text, lang, self.tts.voice(lang)))
+        if audio is None:
+            audio, used_voice = self.tts.synthesize(text, lang)
+            # Stored under the voice that produced it, in case a fallback backend answered
+            self.clip_cache.set(make_clip_key(text, lang, used_voice), audio)
+        return audio
+
+    def _play(self, audio: bytes, volume: float):
+        """Play an MP3 or WAV buffer, returning when it ends or is skipped"""
+        import pygame  # Already imported by _run
+
+        try:
+            # Local engines produce WAV, gTTS produces MP3
+            audio_format = "wav" if audio[:4] == b"RIFF" else "mp3"
+            pygame.mixer.music.load(io.BytesIO(audio), audio_format)
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play()
+            while pygame.mixer.music.get_busy():
+                if self._skip.wait(POLL_INTERVAL):
+                    pygame.mixer.music.stop()
+                    break
+            pygame.mixer.music.unload()
+        except Exception as e:
+            logger.error(f"Error playing voice: {e}")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+chat_history.py - Bounded, virtualized chat history
+
+The chat display is a list view over a model holding one item per message. Only
+the most recent messages are kept in memory; older ones are spilled to an
+append-only session log on disk and paged back in when the user scrolls to the
+top. The view only paints visible messages and caches each message's wrapped
+size, so long sessions stay as cheap to update as short ones.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QTimer
+from PyQt5.QtGui import QColor, QKeySequence
+from PyQt5.QtWidgets import (QAbstractItemView, QApplication, QListView, QShortcut,
+                             QStyle, QStyledItemDelegate)
+
+from llm_cache import CACHE_DIR
+from conversation_memory import USER, ASSISTANT
+
+logger = logging.getLogger(__name__)
+
+SESSION_LOG_DIR = os.path.join(CACHE_DIR, "sessions")
+MAX_HISTORY_MESSAGES = 500  # Messages kept in memory; older ones are read back from the session log
+HISTORY_PAGE_SIZE = 50  # Messages paged back in each time the view is scrolled to the top
+MAX_SESSION_LOGS = 20  # Older session logs are deleted at startup
+MESSAGE_PADDING = 6  # Pixels around each message
+
+SYSTEM = "system"  # Info and error lines that are not part of the conversation
+
+MessageIdRole = Qt.UserRole
+VersionRole = Qt.UserRole + 1
+MessageRole = Qt.UserRole + 2
+
+ROLE_COLORS = {
+    USER: QColor("#1a4f8b"),
+    SYSTEM: QColor("#8b1a1a"),
+}
+
+
+class ChatMessage:
+    """One chat display item"""
+
+    __slots__ = ("message_id", "role", "text", "version", "dirty")
+
+    def __init__(self, message_id: int, role: str, text: str, dirty: bool = True):
+        self.message_id = message_id
+        self.role = role
+        self.text = text
+        self.version = 0  # Bumped on every edit so cached sizes are recomputed
+        self.dirty = dirty  # Changed since it was last written to the session log
+
+
+class SessionLog:
+    """Append-only JSON lines log of spilled messages; the last record of an id wins"""
+
+    def __init__(self, directory: str = SESSION_LOG_DIR, max_logs: int = MAX_SESSION_LOGS):
+        os.makedirs(directory, exist_ok=True)
+        self._prune(directory, max_logs - 1)
+        self.path = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S.jsonl"))
+        self._file = open(self.path, "a+b")
+        self._offsets: Dict[int, int] = {}  # Message id -> offset of its latest record
+
+    @staticmethod
+    def _prune(directory: str, keep: int):
+        logs = sorted(name for name in os.listdir(directory) if name.startswith("session-"))
+        for name in logs[:max(0, len(logs) - keep)]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError as e:
+                logger.warning(f"Could not delete old session log {name}: {e}")
+
+    def write(self, message: ChatMessage):
+        self._file.seek(0, os.SEEK_END)
+        self._offsets[message.message_id] = self._file.tell()
+        record = {"id": message.message_id, "role": message.role, "text": message.text, "time": time.time()}
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def read(self, message_ids: List[int]) -> List[ChatMessage]:
+        """Read the latest record of each id; ids that were never logged are skipped"""
+        messages = []
+        for message_id in message_ids:
+            offset = self._offsets.get(message_id)
+            if offset is None:
+                continue
+            self._file.seek(offset)
+            record = json.loads(self._file.readline())
+            messages.append(ChatMessage(record["id"], record["role"], record["text"], dirty=False))
+        return messages
+
+    def close(self):
+        self._file.close()
+
+
+class ChatHistoryModel(QAbstractListModel):
+    """The most recent chat messages, one row each, with older ones spilled to a SessionLog"""
+
+    def __init__(self, log: Optional[SessionLog] = None, max_messages: int = MAX_HISTORY_MESSAGES, parent=None):
+        super().__init__(parent)
+        self.log = log
+        self.max_messages = max_messages
+        self._messages: List[ChatMessage] = []
+        self._next_id = 1
+        # Set by the view while the user is scrolled up; spilling then would remove the rows being read
+        self.spill_paused = False
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message.text
+        if role == Qt.ForegroundRole:
+            return ROLE_COLORS.get(message.role)
+        if role == MessageIdRole:
+            return message.message_id
+        if role == VersionRole:
+            return message.version
+        if role == MessageRole:
+            return message.role
+        return None
+
+    def _row(self, message_id: int) -> Optional[int]:
+        # Ids are consecutive and rows are only trimmed from or prepended at the front
+        if not self._messages:
+            return None
+        row = message_id - self._messages[0].message_id
+        return row if 0 <= row < len(self._messages) else None
+
+    def append(self, text: str, role: str = ASSISTANT) -> int:
+        """Add a message at the bottom and return its id"""
+        message = ChatMessage(self._next_id, role, text)
+        self._next_id += 1
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append(message)
+        self.endInsertRows()
+        self._spill()
+        return message.message_id
+
+    def update(self, message_id: int, text: str, append: bool = False):
+        """Replace (or extend) the text of a message, in memory or in the session log"""
+        row = self._row(message_id)
+        if row is None:
+            # Already spilled: log the new text so paging it back in shows the latest version
+            if self.log is not None:
+                old = self.log.read([message_id])
+                if old:
+                    old[0].text = old[0].text + text if append else text
+                    self.log.write(old[0])
+            return
+        message = self._messages[row]
+        message.text = message.text + text if append else text
+        message.version += 1
+        message.dirty = True
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, VersionRole])
+
+    def text(self, message_id: int) -> Optional[str]:
+        row = self._row(message_id)
+        return None if row is None else self._messages[row].text
+
+    def has_older(self) -> bool:
+        """Whether messages before the first row can be paged back in"""
+        return bool(self._messages) and self.log is not None and self._messages[0].message_id > 1
+
+    def load_older(self, count: int = HISTORY_PAGE_SIZE) -> int:
+        """Page up to count older messages back in from the session log; return how many were added"""
+        if not self.has_older():
+            return 0
+        first_id = self._messages[0].message_id
+        older = self.log.read(list(range(max(1, first_id - count), first_id)))
+        if not older:
+            return 0
+        self.beginInsertRows(QModelIndex(), 0, len(older) - 1)
+        self._messages[:0] = older
+        self.endInsertRows()
+        return len(older)
+
+    def _spill(self):
+        """Move the oldest messages past max_messages to the session log, unless spilling is paused"""
+        excess = len(self._messages) - self.max_messages
+        if excess <= 0 or self.spill_paused:
+            return
+        if self.log is not None:
+            for message in self._messages[:excess]:
+                if message.dirty:
+                    self.log.write(message)
+        self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+        del self._messages[:excess]
+        self.endRemoveRows()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints a message as wrapped plain text and caches its size per width and version"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sizes: Dict[int, tuple] = {}  # Message id -> (width, version, QSize)
+
+    def _text_rect(self, option) -> QRect:
+        return option.rect.adjusted(MESSAGE_PADDING, MESSAGE_PADDING // 2, -MESSAGE_PADDING, -MESSAGE_PADDING // 2)
+
+    def sizeHint(self, option, index) -> QSize:
+        width = max(1, self.parent().viewport().width()) if self.parent() else option.rect.width()
+        message_id = index.data(MessageIdRole)
+        version = index.data(VersionRole)
+        cached = self._sizes.get(message_id)
+        if cached and cached[0] == width and cached[1] == version:
+            return cached[2]
+        text_width = max(1, width - 2 * MESSAGE_PADDING)
+        bounds = option.fontMetrics.boundingRect(QRect(0, 0, text_width, 1_000_000),
+                                                 Qt.TextWordWrap, index.data(Qt.DisplayRole) or "")
+        size = QSize(width, bounds.height() + MESSAGE_PADDING)
+        if len(self._sizes) > 4 * MAX_HISTORY_MESSAGES:
+            self._sizes.clear()
+        self._sizes[message_id] = (width, version, size)
+        return size
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            color = index.data(Qt.ForegroundRole)
+            painter.setPen(color if color is not None else option.palette.text().color())
+        painter.setFont(option.font)
+        painter.drawText(self._text_rect(option), Qt.TextWordWrap, index.data(Qt.DisplayRole) or "")
+        painter.restore()
+
+
+class ChatHistoryView(QListView):
+    """Virtualized list of chat messages that follows new messages while scrolled to the bottom"""
+
+    def __init__(self, model: ChatHistoryModel, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setItemDelegate(MessageDelegate(self))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.Adjust)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._follow = True  # Scrolled to the bottom, so new messages stay in view
+
+        model.rowsAboutToBeInserted.connect(self._remember_position)
+        model.rowsInserted.connect(self._rows_inserted)
+        self.verticalScrollBar().valueChanged.connect(self._scrolled)
+        QShortcut(QKeySequence.Copy, self, self.copy_selection)
+
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        # Edited messages may wrap to a different height; sizes of unchanged ones come from the cache
+        self._remember_position()
+        super().dataChanged(top_left, bottom_right, roles)
+        self.scheduleDelayedItemsLayout()
+        self._keep_following()
+
+    def resizeEvent(self, event):
+        self._remember_position()
+        super().resizeEvent(event)
+        self._keep_following()
+
+    def _remember_position(self, *args):
+        scroll_bar = self.verticalScrollBar()
+        self._follow = scroll_bar.value() >= scroll_bar.maximum()
+
+    def _keep_following(self):
+        if self._follow:
+            # After the delayed layout has updated the scroll range
+            QTimer.singleShot(0, self.scrollToBottom)
+
+    def _rows_inserted(self, parent, first, last):
+        if first == 0 and last + 1 < self.model().rowCount():
+            # Older messages paged in above: keep the message that was at the top in place
+            self.scrollTo(self.model().index(last + 1), QAbstractItemView.PositionAtTop)
+        else:
+            self._keep_following()
+
+    def _scrolled(self, value):
+        scroll_bar = self.verticalScrollBar()
+        # Paged-in messages stay until the user is back at the bottom; the next message spills them
+        self.model().spill_paused = value < scroll_bar.maximum()
+        if value == scroll_bar.minimum() and self.model().has_older():
+            QTimer.singleShot(0, self.model().load_older)
+
+    def copy_selection(self):
+        """Copy the selected messages to the clipboard, oldest first"""
+        rows = sorted(index.row() for index in self.selectionModel().selectedIndexes())
+        texts = [self.model().index(row).data(Qt.DisplayRole) for row in rows]
+        if texts:
+            QApplication.clipboard().setText("\n\n".join(texts))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+city_gazetteer.py - Local city name lookup for weather questions
+
+Turkish provinces and major world cities are bundled with their names in the
+languages the GUI offers. Names are matched diacritic-insensitively through a
+word trie built on first use, so most weather questions need no model call to
+find the city.
+"""
+
+import re
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from weather_client import normalize_city
+
+logger = logging.getLogger(__name__)
+
+TURKISH_PROVINCES = [
+    "Adana", "Adıyaman", "Afyonkarahisar", "Ağrı", "Aksaray", "Amasya", "Ankara", "Antalya", "Ardahan",
+    "Artvin", "Aydın", "Balıkesir", "Bartın", "Batman", "Bayburt", "Bilecik", "Bingöl", "Bitlis", "Bolu",
+    "Burdur", "Bursa", "Çanakkale", "Çankırı", "Çorum", "Denizli", "Diyarbakır", "Düzce", "Edirne",
+    "Elazığ", "Erzincan", "Erzurum", "Eskişehir", "Gaziantep", "Giresun", "Gümüşhane", "Hakkari", "Hatay",
+    "Iğdır", "Isparta", "İstanbul", "İzmir", "Kahramanmaraş", "Karabük", "Karaman", "Kars", "Kastamonu",
+    "Kayseri", "Kilis", "Kırıkkale", "Kırklareli", "Kırşehir", "Kocaeli", "Konya", "Kütahya", "Malatya",
+    "Manisa", "Mardin", "Mersin", "Muğla", "Muş", "Nevşehir", "Niğde", "Ordu", "Osmaniye", "Rize",
+    "Sakarya", "Samsun", "Şanlıurfa", "Siirt", "Sinop", "Şırnak", "Sivas", "Tekirdağ", "Tokat", "Trabzon",
+    "Tunceli", "Uşak", "Van", "Yalova", "Yozgat", "Zonguldak",
+]
+
+# Short and colloquial names of Turkish cities
+TURKISH_ALIASES = {
+    "Afyonkarahisar": ["Afyon"],
+    "Gaziantep": ["Antep"],
+    "Kahramanmaraş": ["Maraş"],
+    "Şanlıurfa": ["Urfa"],
+    "Kocaeli": ["İzmit"],
+    "Sakarya": ["Adapazarı"],
+    "Hakkari": ["Hakkâri"],
+    "İstanbul": ["Constantinople"],
+}
+
+# Query sent to the weather API -> names in English, Turkish, Spanish, German, French and Russian
+WORLD_CITIES = {
+    "London": ["Londra", "Londres", "Лондон"],
+    "Paris": ["Париж"],
+    "Berlin": ["Берлин"],
+    "Madrid": ["Мадрид"],
+    "Barcelona": ["Barselona", "Барселона"],
+    "Rome": ["Roma", "Rom", "Рим"],
+    "Milan": ["Milano", "Mailand", "Милан"],
+    "Vienna": ["Viyana", "Viena", "Wien", "Vienne", "Вена"],
+    "Munich": ["Münih", "Múnich", "München", "Мюнхен"],
+    "Amsterdam": ["Амстердам"],
+    "Brussels": ["Brüksel", "Bruselas", "Brüssel", "Bruxelles", "Брюссель"],
+    "Prague": ["Prag", "Praga", "Прага"],
+    "Athens": ["Atina", "Atenas", "Athen", "Athènes", "Афины"],
+    "Thessaloniki": ["Selanik", "Salónica", "Saloniki", "Salonique", "Салоники"],
+    "Moscow": ["Moskova", "Moscú", "Moskau", "Moscou", "Москва"],
+    "Saint Petersburg": ["St Petersburg", "Sankt Peterburg", "San Petersburgo", "Sankt Petersburg",
+                         "Saint-Pétersbourg", "Санкт-Петербург", "Петербург"],
+    "Kyiv": ["Kiev", "Kiew", "Киев"],
+    "Minsk": ["Минск"],
+    "Warsaw": ["Varşova", "Varsovia", "Warschau", "Varsovie", "Варшава"],
+    "Budapest": ["Budapeşte", "Будапешт"],
+    "Bucharest": ["Bükreş", "Bucarest", "Bukarest", "Бухарест"],
+    "Sofia": ["Sofya", "Sofía", "Sofie", "София"],
+    "Belgrade": ["Belgrad", "Belgrado", "Белград"],
+    "Sarajevo": ["Saraybosna", "Sarajewo", "Сараево"],
+    "Skopje": ["Üsküp", "Skopie", "Скопье"],
+    "Tirana": ["Tiran", "Тирана"],
+    "Lisbon": ["Lizbon", "Lisboa", "Lissabon", "Lisbonne", "Лиссабон"],
+    "Dublin": ["Дублин"],
+    "Stockholm": ["Estocolmo", "Стокгольм"],
+    "Oslo": ["Осло"],
+    "Copenhagen": ["Kopenhag", "Copenhague", "Kopenhagen", "Копенгаген"],
+    "Helsinki": ["Хельсинки"],
+    "Zurich": ["Zürih", "Zúrich", "Zürich", "Цюрих"],
+    "Geneva": ["Cenevre", "Ginebra", "Genf", "Genève", "Женева"],
+    "Hamburg": ["Hamburgo", "Hambourg", "Гамбург"],
+    "Frankfurt": ["Fráncfort", "Francfort", "Франкфурт"],
+    "Cologne": ["Köln", "Colonia", "Кёльн"],
+    "New York": ["Nueva York", "Нью-Йорк"],
+    "Los Angeles": ["Лос-Анджелес"],
+    "Chicago": ["Şikago", "Чикаго"],
+    "Toronto": ["Торонто"],
+    "Buenos Aires": ["Буэнос-Айрес"],
+    "Sao Paulo": ["São Paulo", "Сан-Паулу"],
+    "Rio de Janeiro": ["Рио-де-Жанейро"],
+    "Tokyo": ["Tokio", "Токио"],
+    "Beijing": ["Pekin", "Pekín", "Peking", "Pékin", "Пекин"],
+    "Shanghai": ["Şanghay", "Shanghái", "Schanghai", "Шанхай"],
+    "Seoul": ["Seul", "Séoul", "Сеул"],
+    "Singapore": ["Singapur", "Singapour", "Сингапур"],
+    "Bangkok": ["Бангкок"],
+    "New Delhi": ["Yeni Delhi", "Nueva Delhi", "Neu-Delhi", "Delhi", "Дели"],
+    "Mumbai": ["Bombay", "Мумбаи"],
+    "Sydney": ["Sidney", "Сидней"],
+    "Dubai": ["Dubai", "Dubái", "Dubaï", "Дубай"],
+    "Doha": ["Доха"],
+    "Riyadh": ["Riyad", "Riad", "Эр-Рияд"],
+    "Cairo": ["Kahire", "El Cairo", "Kairo", "Le Caire", "Каир"],
+    "Baghdad": ["Bağdat", "Bagdad", "Багдад"],
+    "Tehran": ["Tahran", "Teherán", "Teheran", "Téhéran", "Тегеран"],
+    "Baku": ["Bakü", "Bakú", "Bakou", "Баку"],
+    "Tbilisi": ["Tiflis", "Тбилиси"],
+    "Batumi": ["Batum", "Батуми"],
+    "Almaty": ["Almatı", "Алматы"],
+    "Astana": ["Астана"],
+    "Tashkent": ["Taşkent", "Taskent", "Taschkent", "Tachkent", "Ташкент"],
+}
+
+# Names that are also common words ("karşı" is "Kars" plus an ending); they only match
+# as whole words written with a capital letter
+AMBIGUOUS_NAMES = {"van", "batman", "ordu", "mus", "tokat", "rize", "kars", "bolu", "sofia", "kilis", "rom"}
+
+# Turkish case endings written straight after a city name ("Ankarada", "İzmir'in")
+TURKISH_SUFFIXES = sorted({
+    "da", "de", "ta", "te", "daki", "deki", "taki", "teki", "dan", "den", "tan", "ten",
+    "a", "e", "ya", "ye", "na", "ne", "i", "u", "yi", "yu", "nin", "nun", "in", "un", "li", "lu",
+}, key=len, reverse=True)
+# Russian case endings ("в Москве", "в Лондоне"); the stem may also have lost a final а
+RUSSIAN_SUFFIXES = ["ой", "ом", "е", "у", "ы", "и", "а"]
+MIN_STEM_LENGTH = 4  # Shorter names must match whole words
+
+_END = "$"
+_trie: Optional[Dict] = None
+_trie_lock = threading.Lock()
+
+
+def _ascii_name(name: str) -> str:
+    """Strip diacritics keeping the capitalization, for the weather API query"""
+    text = unicodedata.normalize("NFKD", name.replace("ı", "i"))
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _words(text: str) -> List[str]:
+    # Apostrophes and hyphens split words: "İstanbul'da" -> "İstanbul", "da"
+    return re.findall(r"\w+", text)
+
+
+def _build_trie() -> Dict:
+    """Index every name as a sequence of normalized words"""
+    entries = {}
+    for province in TURKISH_PROVINCES:
+        query = f"{_ascii_name(province)}, Turkey"
+        for name in [province, _ascii_name(province)] + TURKISH_ALIASES.get(province, []):
+            entries[name] = query
+    for query, aliases in WORLD_CITIES.items():
+        for name in [query] + aliases:
+            entries[name] = query
+
+    trie = {}
+    for name, query in entries.items():
+        node = trie
+        for word in _words(normalize_city(name)):
+            node = node.setdefault(word, {})
+        node[_END] = query
+    logger.info(f"City gazetteer indexed {len(entries)} names")
+    return trie
+
+
+def _get_trie() -> Dict:
+    global _trie
+    if _trie is None:
+        with _trie_lock:
+            if _trie is None:
+                _trie = _build_trie()
+    return _trie
+
+
+def _base_forms(word: str) -> List[str]:
+    """Return the possible uninflected forms of a word carrying a case ending"""
+    forms = []
+    for suffix in TURKISH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            forms.append(word[:-len(suffix)])
+    for suffix in RUSSIAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH - 1:
+            stem = word[:-len(suffix)]
+            forms.extend([stem, stem + "а"])
+    return forms
+
+
+def find_cities(text: str) -> List[str]:
+    """
+    Find the cities named in a message
+
+    Args:
+        text: The user's message
+
+    Returns:
+        list: Weather API queries of the cities found, in order of first mention
+    """
+    trie = _get_trie()
+    original = _words(text)
+    words = [normalize_city(word) for word in original]
+    found = []
+    i = 0
+    while i < len(words):
+        match = None  # (query, index of the last word)
+        node = trie
+        for j in range(i, len(words)):
+            word = words[j]
+            if word in node:
+                node = node[word]
+                if _END in node and not (j == i and word in AMBIGUOUS_NAMES and not original[i][0].isupper()):
+                    match = (node[_END], j)
+                continue
+            # The last word of a name may carry a case ending
+            for stem in _base_forms(word):
+                if stem in node and _END in node[stem] and stem not in AMBIGUOUS_NAMES:
+                    match = (node[stem][_END], j)
+                    break
+            break
+
+        if match is None:
+            i += 1
+            continue
+        if match[0] not in found:
+            found.append(match[0])
+        i = match[1] + 1
+    return found
+
+
+def find_city(text: str) -> Optional[str]:
+    """Return the first city named in a message, or None"""
+    cities = find_cities(text)
+    return cities[0] if cities else None
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+conversation_memory.py - Token-bounded per-session conversation memory with background summarization
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple, Any
+
+from prompt_codec import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TOKEN_BUDGET = 1500  # Tokens of history (summary + turns) sent with each request
+MIN_RECENT_TURNS = 2  # Turns that are never summarized away
+MAX_TURN_TOKENS = 400  # Longer turns are truncated before being stored
+SUMMARY_MAX_WORDS = 120
+MAX_SESSIONS = 100
+
+SUMMARY_PROMPT = """
+    You maintain a running summary of a conversation between a user and the Tetra AI assistant.
+    Merge the new conversation turns given by the user into the existing summary below.
+    Keep facts that later questions may refer to: products, search terms, prices, cities, preferences and decisions.
+    Answer with the updated summary only, at most {max_words} words.
+
+    EXISTING SUMMARY:
+    {summary}
+    """
+
+# Role names used in history; mapped to model message types by the caller
+USER = "user"
+ASSISTANT = "assistant"
+SUMMARY = "summary"
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # estimate_tokens is about four characters per token
+    return text[:max_tokens * 4].rstrip() + "…"
+
+
+class ConversationMemory:
+    """Rolling window of turns within a token budget, older turns folded into a summary"""
+
+    def __init__(self, chat_bot=None, token_budget: int = MEMORY_TOKEN_BUDGET,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.chat_bot = chat_bot
+        self.token_budget = token_budget
+        self.summary = ""
+        self.last_used = time.monotonic()
+        self._turns: List[Tuple[str, str]] = []
+        self._pending: List[Tuple[str, str]] = []  # Turns currently being summarized
+        self._summarizing = False
+        self._results = {}  # agent -> (key, result) of the last result set
+        self._lock = threading.Lock()
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+    def add_turn(self, role: str, text: str):
+        """Append a turn and summarize older turns in the background if over budget"""
+        if not text:
+            return
+        with self._lock:
+            self._turns.append((role, _truncate(text.strip(), MAX_TURN_TOKENS)))
+            self.last_used = time.monotonic()
+        self._compact()
+
+    def history(self) -> List[Tuple[str, str]]:
+        """Return (role, text) pairs to send with the next request, oldest first"""
+        with self._lock:
+            messages = []
+            if self.summary:
+                messages.append((SUMMARY, self.summary))
+            messages.extend(self._pending)
+            messages.extend(self._turns)
+            return messages
+
+    def set_last_results(self, agent: str, key: str, result: Any):
+        """Remember the latest result set of an agent (e.g. scraped products for a search term)"""
+        with self._lock:
+            self._results[agent] = (key, result)
+
+    def last_results(self, agent: str, key: Optional[str] = None) -> Optional[Any]:
+        """Return the agent's last result set, only if it was stored under key when key is given"""
+        with self._lock:
+            stored = self._results.get(agent)
+        if stored is None or (key is not None and stored[0] != key):
+            return None
+        return stored[1]
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self._turns.clear()
+            self._pending.clear()
+            self._results.clear()
+
+    def _window_tokens(self, include_pending: bool = True) -> int:
+        turns = self._pending + self._turns if include_pending else self._turns
+        return estimate_tokens(self.summary) + sum(estimate_tokens(text) for _, text in turns)
+
+    def _compact(self):
+        """Move the oldest turns out of the window and summarize them off-thread"""
+        with self._lock:
+            if self._summarizing or self._window_tokens() <= self.token_budget:
+                return
+
+            # Free up half of the budget so summarization does not run after every turn; pending
+            # turns are on their way into the summary, so they do not count towards what is kept
+            batch = []
+            while (len(self._turns) > MIN_RECENT_TURNS
+                   and self._window_tokens(include_pending=False) > self.token_budget // 2):
+                batch.append(self._turns.pop(0))
+                self._pending.append(batch[-1])
+            if not batch:
+                return
+            self._summarizing = True
+
+        self._executor.submit(self._summarize, batch)
+
+    def _summarize(self, batch: List[Tuple[str, str]]):
+        """Fold a batch of turns into the running summary"""
+        summary = None
+        if self.chat_bot is not None:
+            turns_text = "\n".join(f"{role}: {text}" for role, text in batch)
+            system_prompt = SUMMARY_PROMPT.format(max_words=SUMMARY_MAX_WORDS, summary=self.summary or "(empty)")
+            try:
+                summary = self.chat_bot.process_request(turns_text, system_prompt, agent="memory_summarizer")
+            except Exception as e:
+                logger.error(f"Error summarizing conversation: {e}")
+
+        with self._lock:
+            if summary:
+                self.summary = _truncate(summary.strip(), SUMMARY_MAX_WORDS * 2)
+                logger.info(f"Conversation memory summarized {len(batch)} turns")
+            else:
+                # Without a summary the turns are dropped so the window stays bounded
+                logger.warning(f"Dropping {len(batch)} turns from memory without a summary")
+            self._pending = []
+            self._summarizing = False
+
+        # Turns may have been added while the summary was generated
+        self._compact()
+
+
+class SessionMemoryStore:
+    """Conversation memories by session id, dropping the least recently used sessions"""
+
+    def __init__(self, chat_bot=None, max_sessions: int = MAX_SESSIONS):
+        self.chat_bot = chat_bot
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One summarizer thread shared by all sessions
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+    def get(self, session_id: str) -> ConversationMemory:
+        """Return the memory for a session, creating it on first use"""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = ConversationMemory(self.chat_bot, executor=self._executor)
+                self._sessions[session_id] = memory
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return memory
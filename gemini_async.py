@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+gemini_async.py - Asyncio Gemini client with concurrency limits, deadlines, retries and a circuit breaker
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Awaitable, Callable, TypeVar
+
+from llm_cache import ResponseCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MODEL_NAME = "gemini-2.0-flash"  # Used by the synchronous client in tetra.py as well
+MAX_CONCURRENT_REQUESTS = 8  # Shared across every caller of the client
+DEFAULT_TIMEOUT = 30.0  # Seconds, covering all retries of one call
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # Seconds before the first retry
+BACKOFF_MAX = 8.0
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures before the circuit opens
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds before a trial call is let through
+
+_genai_lock = threading.Lock()
+_genai_api_key: Optional[str] = None
+_transient_errors: Optional[tuple] = None
+
+
+def load_genai(api_key: str):
+    """
+    Import google.generativeai and configure it with api_key
+
+    The SDK and langchain take most of the application's import time, so they are
+    imported on the first model call (or by the GUI's background pre-warm) instead
+    of at startup.
+    """
+    global _genai_api_key
+    import google.generativeai as genai
+
+    with _genai_lock:
+        if _genai_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_api_key = api_key
+    return genai
+
+
+def transient_errors() -> tuple:
+    """Errors worth retrying: quota exhaustion, overloaded or briefly unavailable backends"""
+    global _transient_errors
+    if _transient_errors is None:
+        from google.api_core import exceptions as google_exceptions
+
+        _transient_errors = (
+            google_exceptions.ResourceExhausted,
+            google_exceptions.TooManyRequests,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.InternalServerError,
+            google_exceptions.DeadlineExceeded,
+            asyncio.TimeoutError,
+            ConnectionError,
+        )
+    return _transient_errors
+
+
+class GeminiRequestError(Exception):
+    """Raised when a model call fails permanently or runs out of retries"""
+
+
+class GeminiTimeoutError(GeminiRequestError):
+    """Raised when a model call does not finish before its deadline"""
+
+
+class CircuitOpenError(GeminiRequestError):
+    """Raised when the circuit breaker is rejecting calls"""
+
+
+class CircuitBreaker:
+    """Stops calling the model after repeated failures and probes again after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not be attempted"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Gemini circuit breaker is open")
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                # Only one trial call is allowed while half open
+                if self._trial_in_flight:
+                    raise CircuitOpenError("Gemini circuit breaker is half open")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Let another trial through after a call that neither succeeded nor failed (e.g. cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Gemini circuit breaker opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Return a full-jitter exponential backoff delay for the given retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _LoopThread:
+    """A background thread running one event loop that all synchronous callers share"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="gemini-async-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread: Optional[_LoopThread] = None
+_loop_thread_lock = threading.Lock()
+
+
+def get_loop_thread() -> _LoopThread:
+    """Return the shared background event loop, starting it on first use"""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = _LoopThread()
+        return _loop_thread
+
+
+class AsyncGeminiChatBot:
+    """Asyncio variant of GeminiChatBot for concurrent use by GUI workers and services"""
+
+    def __init__(self, api_key: str, response_cache: Optional[ResponseCache] = None,
+                 max_concurrency: int = MAX_CONCURRENT_REQUESTS, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, breaker: Optional[CircuitBreaker] = None):
+        self.api_key = api_key
+        self.response_cache = response_cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        # Created lazily so it binds to the event loop that first uses it
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def process_request(self, user_input: str, system_prompt: str, agent: Optional[str] = None,
+                              language: str = "English", timeout: Optional[float] = None,
+                              use_cache: bool = True) -> str:
+        """
+        Process a text-only request using the Gemini model
+
+        Args:
+            user_input: The user's input text
+            system_prompt: The system prompt to guide the model
+            agent: Name of the calling agent, used for cache metrics and logging
+            language: The response language, part of the cache key
+            timeout: Deadline in seconds for the call including retries
+            use_cache: Whether to read and write the response cache
+
+        Returns:
+            str: The model's response
+
+        Raises:
+            GeminiRequestError: If the call fails, times out or the circuit is open
+        """
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = make_cache_key(MODEL_NAME, system_prompt, user_input, language)
+            cached = self.response_cache.get(cache_key, agent)
+            if cached is not None:
+                return cached
+
+        async def call() -> str:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            from langchain_core.prompts import ChatPromptTemplate
+            from langchain_core.output_parsers import StrOutputParser
+
+            model = ChatGoogleGenerativeAI(
+                model=MODEL_NAME,
+                google_api_key=self.api_key,
+                temperature=0
+            )
+            prompt_template = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("user", "{user_input}")
+            ])
+            chain = prompt_template | model | StrOutputParser()
+            return await chain.ainvoke({"user_input": user_input})
+
+        result = await self._call_with_policy(call, timeout, agent)
+        if cache_key is not None and result:
+            self.response_cache.set(cache_key, result)
+        return result
+
+    async def process_parts_request(self, parts: list, agent: Optional[str] = None,
+                                    timeout: Optional[float] = None) -> str:
+        """
+        Process a multimodal request from prepared content parts
+
+        Args:
+            parts: Gemini content parts (text and inline_data dicts)
+            agent: Name of the calling agent, used for logging
+            timeout: Deadline in seconds for the call including retries
+
+        Returns:
+            str: The model's response
+
+        Raises:
+            GeminiRequestError: If the call fails, times out or the circuit is open
+        """
+        async def call() -> str:
+            model = load_genai(self.api_key).GenerativeModel(MODEL_NAME)
+            response = await model.generate_content_async(parts, generation_config={"temperature": 0})
+            return response.text
+
+        return await self._call_with_policy(call, timeout, agent)
+
+    async def _call_with_policy(self, call: Callable[[], Awaitable[str]], timeout: Optional[float],
+                                agent: Optional[str]) -> str:
+        """Run call under the semaphore with a deadline, retries and the circuit breaker"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.timeout)
+        agent = agent or "default"
+
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise GeminiTimeoutError(f"{agent}: deadline exceeded before the call started")
+            self.breaker.before_call()
+
+            try:
+                async with self.semaphore:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    result = await asyncio.wait_for(call(), timeout=remaining)
+                self.breaker.record_success()
+                return result
+
+            except transient_errors() as e:
+                self.breaker.record_failure()
+                remaining = deadline - loop.time()
+                if attempt >= self.max_retries or remaining <= 0:
+                    if isinstance(e, asyncio.TimeoutError) or remaining <= 0:
+                        raise GeminiTimeoutError(f"{agent}: model call timed out") from e
+                    raise GeminiRequestError(f"{agent}: model call failed after {attempt + 1} attempts: {e}") from e
+
+                delay = min(backoff_delay(attempt), remaining)
+                logger.warning(f"{agent}: transient Gemini error ({type(e).__name__}), "
+                               f"retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+            except GeminiRequestError:
+                self.breaker.release_trial()
+                raise
+
+            except Exception as e:
+                # Invalid requests and other permanent errors are not retried; they say nothing
+                # about the health of the backend, so they do not count towards opening the circuit
+                self.breaker.release_trial()
+                raise GeminiRequestError(f"{agent}: model call failed: {e}") from e
+
+            except BaseException:
+                # Cancelled (e.g. by run_sync's timeout): a half-open breaker must not wait forever
+                self.breaker.release_trial()
+                raise
+
+    def run_sync(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine of this client on the shared event loop and wait for its result
+
+        This is how QThread workers and other synchronous code use the client; all
+        callers share one loop so the concurrency limit applies across them. Async
+        callers should await the coroutines directly on that same loop.
+        """
+        future = get_loop_thread().submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as e:
+            future.cancel()
+            raise GeminiTimeoutError("Timed out waiting for the model call") from e
@@ -12,10 +12,8 @@ import re
 import random
 from selenium.common.exceptions import TimeoutException
 
-def hepsiburada_urunleri_incele(arama_kelimesi, urun_sayisi=10):
-    # JSON verisini tutacak dictionary
-    urun_verileri = {}
-    
+def tarayici_baslat():
+    """Bot tespitine karşı ayarlanmış headless Chrome WebDriver'ı başlatır"""
     # Chrome ayarlarını yapılandırma
     chrome_options = Options()
     chrome_options.add_argument("--headless=new")  # Yeni ve daha iyi headless mod
@@ -46,64 +44,98 @@ def hepsiburada_urunleri_incele(arama_kelimesi, urun_sayisi=10):
     
     service = Service(driver_path)
     
+    # WebDriver'ı başlat
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    
+    # WebDriver javascript değişkenini gizle
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+        Object.defineProperty(navigator, 'webdriver', {
+          get: () => undefined
+        });
+
+        // Selenium tanımlamalarını gizle
+        window.navigator.chrome = {
+            runtime: {},
+        };
+
+        // Ek Javascript gizleme
+        Object.defineProperty(navigator, 'plugins', {
+            get: () => [1, 2, 3, 4, 5]
+        });
+
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['en-US', 'en', 'tr']
+        });
+        """
+    })
+
+    return driver
+
+
+def arama_sayfasini_ac(driver, arama_kelimesi):
+    """Arama sonuç sayfasını açar, çerez mesajlarını kapatır ve sayfanın yüklenmesini bekler"""
+    # Hepsiburada ana sayfasına git ve arama yap
+    print("Hepsiburada sitesine bağlanılıyor...")
+    driver.get(f"https://www.hepsiburada.com/ara?q={arama_kelimesi}")
+    print(f"Hepsiburada sitesi açıldı ve '{arama_kelimesi}' için arama yapıldı.")
+    
+    # Cookie/popup kapatma - bunlar veri çekmeyi engelleyebilir
     try:
-        # WebDriver'ı başlat
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Çerezleri kabul et butonu varsa tıkla
+        cookie_buttons = [
+            "//button[contains(@id, 'onetrust-accept')]",
+            "//button[contains(text(), 'Kabul')]", 
+            "//button[contains(text(), 'Tümünü Kabul Et')]",
+            "//div[contains(@class, 'closeIcon')]"
+        ]
         
-        # WebDriver javascript değişkenini gizle
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            });
-            
-            // Selenium tanımlamalarını gizle
-            window.navigator.chrome = {
-                runtime: {},
-            };
-            
-            // Ek Javascript gizleme
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5]
-            });
-            
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en', 'tr']
-            });
-            """
-        })
+        for button_xpath in cookie_buttons:
+            try:
+                cookie_button = WebDriverWait(driver, 2).until(
+                    EC.element_to_be_clickable((By.XPATH, button_xpath))
+                )
+                cookie_button.click()
+                print("Cookie mesajı kapatıldı.")
+                time.sleep(1)
+                break
+            except:
+                continue
+    except:
+        pass
+    
+    # Sayfanın yüklenmesi için bekle
+    time.sleep(3)
 
-        # Hepsiburada ana sayfasına git ve arama yap
-        print("Hepsiburada sitesine bağlanılıyor...")
-        driver.get(f"https://www.hepsiburada.com/ara?q={arama_kelimesi}")
-        print(f"Hepsiburada sitesi açıldı ve '{arama_kelimesi}' için arama yapıldı.")
-        
-        # Cookie/popup kapatma - bunlar veri çekmeyi engelleyebilir
-        try:
-            # Çerezleri kabul et butonu varsa tıkla
-            cookie_buttons = [
-                "//button[contains(@id, 'onetrust-accept')]",
-                "//button[contains(text(), 'Kabul')]", 
-                "//button[contains(text(), 'Tümünü Kabul Et')]",
-                "//div[contains(@class, 'closeIcon')]"
-            ]
-            
-            for button_xpath in cookie_buttons:
-                try:
-                    cookie_button = WebDriverWait(driver, 2).until(
-                        EC.element_to_be_clickable((By.XPATH, button_xpath))
-                    )
-                    cookie_button.click()
-                    print("Cookie mesajı kapatıldı.")
-                    time.sleep(1)
-                    break
-                except:
-                    continue
-        except:
-            pass
-        
-        # Sayfanın yüklenmesi için bekle
-        time.sleep(3)
+
+def hepsiburada_urunleri_incele(arama_kelimesi, urun_sayisi=10, driver=None, acik_arama=None,
+                                urun_bulundu=None):
+    """
+    Hepsiburada'da arama yapar ve ilk ürünlerin bilgilerini toplar
+
+    Args:
+        arama_kelimesi (str): Aranacak ürün
+        urun_sayisi (int): İncelenecek ürün sayısı
+        driver: Önceden başlatılmış WebDriver (verilirse kullanılır ve sonunda kapatılır)
+        acik_arama (str): Verilen driver'da arama sayfası zaten açık olan kelime
+        urun_bulundu (callable): Her ürün okunduğunda (urun_id, urun_data) ile çağrılır,
+            böylece sonuçlar tarama bitmeden gösterilebilir
+
+    Returns:
+        dict: urun_1, urun_2, ... anahtarlarıyla ürün verileri
+    """
+    # JSON verisini tutacak dictionary
+    urun_verileri = {}
+    
+    try:
+        if driver is None:
+            driver = tarayici_baslat()
+
+        # Arama sayfası önceden açılmışsa tekrar yükleme
+        if acik_arama != arama_kelimesi:
+            arama_sayfasini_ac(driver, arama_kelimesi)
+        else:
+            print(f"'{arama_kelimesi}' arama sayfası zaten açık.")
         
         # Kaç ürün incelenecek
         incelenecek_urun_sayisi = min(urun_sayisi, 5)  # En fazla 10 ürün
@@ -342,6 +374,13 @@ def hepsiburada_urunleri_incele(arama_kelimesi, urun_sayisi=10):
                     
                     # Ürün verilerini ana JSON'a ekle
                     urun_verileri[f"urun_{i+1}"] = urun_data
+
+                    # Ürünü hemen yayınla; dinleyicideki bir hata taramayı durdurmasın
+                    if urun_bulundu is not None:
+                        try:
+                            urun_bulundu(f"urun_{i+1}", dict(urun_data))
+                        except Exception as e:
+                            print(f"Ürün bildirimi başarısız: {str(e)}")
                     
                 except Exception as e:
                     print(f"Ürün kartı bulunamadı: {str(e)}")
@@ -356,7 +395,7 @@ def hepsiburada_urunleri_incele(arama_kelimesi, urun_sayisi=10):
     
     finally:
         # WebDriver'ı kapat
-        if 'driver' in locals():
+        if driver is not None:
             driver.quit()
             print("Tarayıcı kapatıldı.")
     
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+image_batch.py - Analysis of several images for one question
+
+Images are sent together in one multimodal request, each preceded by its number.
+When the batch is too large for one request, each image is analyzed by a bounded
+number of parallel calls and a final text-only call combines the answers.
+"""
+
+import re
+import asyncio
+import logging
+from typing import List, NamedTuple, Optional
+
+from gemini_async import AsyncGeminiChatBot, GeminiRequestError
+from image_pipeline import PreparedImage
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_IMAGES = 10  # Images the GUI accepts for one question
+MAX_IMAGES_PER_REQUEST = 6  # Larger batches are fanned out one image per call
+MAX_REQUEST_BYTES = 15 * 1024 * 1024  # Inline data budget of one request (API limit is 20 MB)
+FAN_OUT_CONCURRENCY = 4
+
+SECTION_HEADER = "### Image {number}"
+SUMMARY_HEADER = "### Summary"
+
+BATCH_INSTRUCTIONS = f"""
+    You have been given {{count}} images, numbered in the order they appear.
+    Answer the user's message for each image under its own heading "{SECTION_HEADER.format(number='N')}"
+    (N being the image number), then compare or combine them under the heading "{SUMMARY_HEADER}".
+    """
+
+COMBINE_PROMPT = """
+    You were asked the user's message about {count} images. Each image was analyzed separately; the
+    separate answers are given below. Write one combined answer to the user's message that compares the
+    images and refers to them by number. Do not repeat the separate answers in full.
+    Your response must be in the language: {language}
+
+    SEPARATE ANSWERS:
+    {answers}
+    """
+
+
+class BatchAnalysis(NamedTuple):
+    """Answers for each image of a batch and for the batch as a whole"""
+    per_image: List[str]
+    combined: str
+
+    def to_text(self) -> str:
+        """Render the answers with the same headings the single-request answer uses"""
+        sections = [f"{SECTION_HEADER.format(number=i + 1)}\n{answer.strip()}"
+                    for i, answer in enumerate(self.per_image)]
+        sections.append(f"{SUMMARY_HEADER}\n{self.combined.strip()}")
+        return "\n\n".join(sections)
+
+
+def fits_single_request(images: List[PreparedImage]) -> bool:
+    """Whether the whole batch can go out as one multimodal request"""
+    return (len(images) <= MAX_IMAGES_PER_REQUEST
+            and sum(len(image.data) for image in images) <= MAX_REQUEST_BYTES)
+
+
+def build_batch_parts(user_input: str, images: List[PreparedImage], system_prompt: str) -> list:
+    """Build the content parts of one request carrying every image, each preceded by its number"""
+    parts = [{"text": f"{system_prompt}\n{BATCH_INSTRUCTIONS.format(count=len(images))}\n\n"
+                      f"User Message: {user_input}"}]
+    for number, image in enumerate(images, start=1):
+        parts.append({"text": f"Image {number}:"})
+        parts.append({"inline_data": {"mime_type": image.mime_type, "data": image.data}})
+    return parts
+
+
+def split_sections(text: str, count: int) -> BatchAnalysis:
+    """Split a single-request answer into its per-image sections and summary"""
+    pattern = r"^#+\s*(?:Image\s+(\d+)|Summary)\s*:?\s*$"
+    per_image = [""] * count
+    combined = ""
+    matches = list(re.finditer(pattern, text, flags=re.MULTILINE | re.IGNORECASE))
+    if not matches:
+        return BatchAnalysis(per_image, text.strip())
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if match.group(1) is None:
+            combined = body
+        elif 1 <= int(match.group(1)) <= count:
+            per_image[int(match.group(1)) - 1] = body
+    return BatchAnalysis(per_image, combined)
+
+
+async def analyze_fan_out(client: AsyncGeminiChatBot, user_input: str, images: List[PreparedImage],
+                          system_prompt: str, language: str = "English",
+                          concurrency: int = FAN_OUT_CONCURRENCY,
+                          timeout: Optional[float] = None) -> BatchAnalysis:
+    """
+    Analyze each image in its own call, at most concurrency at a time, then combine the answers
+
+    Args:
+        client: Async Gemini client used for all calls
+        user_input: The user's question about the images
+        images: Prepared images, in the order the user added them
+        system_prompt: The image analysis system prompt
+        language: Response language of the combined answer
+        concurrency: Maximum parallel image calls
+        timeout: Deadline in seconds of each call
+
+    Returns:
+        BatchAnalysis: Per-image answers (an error note for failed images) and the combined answer
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    prompt = f"{system_prompt}\n\nUser Message: {user_input}"
+
+    async def analyze(image: PreparedImage) -> str:
+        parts = [{"text": prompt}, {"inline_data": {"mime_type": image.mime_type, "data": image.data}}]
+        async with semaphore:
+            try:
+                return await client.process_parts_request(parts, agent="image_analysis", timeout=timeout)
+            except GeminiRequestError as e:
+                logger.warning(f"Image analysis failed in batch: {e}")
+                return f"(analysis failed: {e})"
+
+    per_image = list(await asyncio.gather(*(analyze(image) for image in images)))
+    logger.info(f"Analyzed {len(images)} images in parallel calls")
+
+    answers = "\n\n".join(f"Image {i + 1}:\n{answer}" for i, answer in enumerate(per_image))
+    try:
+        combined = await client.process_request(
+            user_input, COMBINE_PROMPT.format(count=len(images), language=language, answers=answers),
+            agent="image_analysis", language=language, timeout=timeout
+        )
+    except GeminiRequestError as e:
+        logger.warning(f"Combining image answers failed: {e}")
+        combined = ""
+    return BatchAnalysis(per_image, combined)
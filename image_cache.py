@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+image_cache.py - Disk-backed cache of image analysis answers keyed by perceptual hash
+
+Answers are stored per question (normalized text, system prompt and language) and
+image perceptual hash. A lookup returns the answer of an identical image or, failing
+that, of the closest image within a few bits of Hamming distance, so a screenshot
+that was re-saved or re-compressed is not analyzed again.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+from typing import Optional, Dict
+
+from image_pipeline import hamming_distance
+from llm_cache import CACHE_DIR, DEFAULT_TTL_SECONDS, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_FILE = os.path.join(CACHE_DIR, "image_analyses.sqlite3")
+DEFAULT_MAX_ENTRIES = 2000
+# Differing bits (out of 64) still treated as the same image. Kept low so two
+# screenshots of different error messages in the same dialog do not collide.
+NEAR_DUPLICATE_DISTANCE = 3
+
+
+def normalize_question(text: str) -> str:
+    """Casefold the question, drop punctuation and collapse whitespace"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def make_image_question_key(model: str, system_prompt: str, user_input: str, language: str) -> str:
+    """Build the question part of an image cache key (the image hash is matched separately)"""
+    return make_cache_key(model, system_prompt, normalize_question(user_input), language)
+
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit hash into SQLite's signed INTEGER range"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class ImageAnalysisCache:
+    """SQLite cache of image answers with TTL expiry, LRU eviction and near-duplicate lookup"""
+
+    def __init__(self, path: str = IMAGE_CACHE_FILE, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {"exact": 0, "near": 0, "misses": 0}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # Shared between the GUI thread and worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                question_key TEXT NOT NULL,
+                phash INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (question_key, phash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_image_last_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, question_key: str, phash: int) -> Optional[str]:
+        """Return the answer for the closest cached image within max_distance, or None"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT phash, value FROM entries WHERE question_key = ? AND created >= ?",
+                (question_key, now - self.ttl)
+            ).fetchall()
+
+            best = None
+            for stored_hash, value in rows:
+                distance = hamming_distance(_to_unsigned(stored_hash), phash)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, stored_hash, value)
+
+            if best is None:
+                self._counters["misses"] += 1
+                return None
+
+            distance, stored_hash, value = best
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE question_key = ? AND phash = ?",
+                (now, question_key, stored_hash)
+            )
+            self._conn.commit()
+            self._counters["exact" if distance == 0 else "near"] += 1
+
+        logger.info(f"Image analysis cache hit (distance {distance}, hit rate: {self.hit_rate():.0%})")
+        return value
+
+    def set(self, question_key: str, phash: int, value: str):
+        """Store an answer and evict old entries if the cache grew past its limits"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (question_key, phash, value, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (question_key, _to_signed(phash), value, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        self._conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM entries WHERE rowid IN "
+            "(SELECT rowid FROM entries ORDER BY last_access ASC LIMIT ?)",
+            (count - self.max_entries,)
+        )
+        logger.info(f"Image analysis cache evicted {count - self.max_entries} entries")
+
+    def hit_rate(self) -> float:
+        hits = self._counters["exact"] + self._counters["near"]
+        total = hits + self._counters["misses"]
+        return hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Return exact/near hit and miss counters and the number of stored answers"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {"entries": count, **self._counters, "hit_rate": self.hit_rate()}
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
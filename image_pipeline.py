@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+image_pipeline.py - In-memory image preprocessing before upload to Gemini
+
+Images are decoded once, downscaled to a maximum edge, re-encoded with quality
+control and handed to the model as bytes with their real MIME type.
+"""
+
+import io
+import logging
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from PIL import Image  # Imported on first use; Pillow is only needed once an image is attached
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_EDGE = 1536  # Pixels; larger images are downscaled before upload
+IMAGE_QUALITY = 85  # JPEG/WebP quality used when re-encoding
+# Images already smaller than this and within the max edge are sent unchanged
+PASSTHROUGH_MAX_BYTES = 300 * 1024
+
+# Formats the Gemini API accepts as inline image data
+SUPPORTED_MIME_TYPES = {"image/png", "image/jpeg", "image/webp", "image/heic", "image/heif"}
+
+# Leading bytes of common image formats
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+class PreparedImage(NamedTuple):
+    """Image bytes ready to send as inline data"""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_bytes: int
+    phash: int  # 64-bit perceptual hash of the decoded image
+
+
+def perceptual_hash(img: "Image.Image") -> int:
+    """
+    Return a 64-bit difference hash of an image
+
+    Each bit compares two horizontally adjacent pixels of a 9x8 grayscale copy, so
+    re-encoded, resized or slightly recompressed copies of an image hash alike.
+    """
+    from PIL import Image
+
+    small = img.convert("L").resize((9, 8), Image.BOX)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+def sniff_mime_type(data: bytes) -> Optional[str]:
+    """Return the MIME type from the file's leading bytes, or None if unknown"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1", b"ftypmsf1"):
+        return "image/heic"
+    for magic, mime_type in MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime_type
+    return None
+
+
+def prepare_image(source: Union[str, bytes], max_edge: int = IMAGE_MAX_EDGE,
+                  quality: int = IMAGE_QUALITY) -> PreparedImage:
+    """
+    Decode, downscale and re-encode an image for upload
+
+    Args:
+        source: Path to the image file or its raw bytes
+        max_edge: Maximum width/height in pixels of the uploaded image
+        quality: JPEG/WebP encoder quality
+
+    Returns:
+        PreparedImage: Encoded bytes with their MIME type, dimensions and perceptual hash
+
+    Raises:
+        ValueError: If the data is not a readable image
+    """
+    from PIL import Image, ImageOps
+
+    if isinstance(source, str):
+        with open(source, "rb") as image_file:
+            raw = image_file.read()
+    else:
+        raw = source
+
+    source_mime = sniff_mime_type(raw)
+    try:
+        img = Image.open(io.BytesIO(raw))
+        if img.format == "JPEG":
+            # Let the JPEG decoder skip detail at a reduced scale that still covers max_edge
+            img.draft(img.mode, (max_edge, max_edge))
+        # Apply the camera's EXIF rotation before the orientation tag is lost on re-encode
+        img = ImageOps.exif_transpose(img)
+    except Exception as e:
+        raise ValueError(f"Unreadable image: {e}") from e
+
+    width, height = img.size
+    phash = perceptual_hash(img)
+    if (source_mime in SUPPORTED_MIME_TYPES and max(width, height) <= max_edge
+            and len(raw) <= PASSTHROUGH_MAX_BYTES):
+        return PreparedImage(raw, source_mime, width, height, len(raw), phash)
+
+    if max(width, height) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    # JPEG for opaque images; WebP keeps transparency at a fraction of PNG's size
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    buffer = io.BytesIO()
+    if has_alpha:
+        img.convert("RGBA").save(buffer, format="WEBP", quality=quality, method=4)
+        mime_type = "image/webp"
+    else:
+        img.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+        mime_type = "image/jpeg"
+    data = buffer.getvalue()
+
+    # Re-encoding a small, already compressed image can make it larger
+    if source_mime in SUPPORTED_MIME_TYPES and len(raw) <= len(data) and img.size == (width, height):
+        return PreparedImage(raw, source_mime, width, height, len(raw), phash)
+
+    logger.info(f"Image prepared: {width}x{height} {len(raw) // 1024} KB -> "
+                f"{img.width}x{img.height} {mime_type} {len(data) // 1024} KB")
+    return PreparedImage(data, mime_type, img.width, img.height, len(raw), phash)
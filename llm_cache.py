@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+llm_cache.py - Disk-backed response cache for Gemini text requests
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "cache"
+LLM_CACHE_FILE = os.path.join(CACHE_DIR, "llm_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60  # One day
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024  # 20 MB of cached responses
+
+
+def hash_text(text: str) -> str:
+    """Return a stable SHA-256 hex digest of the given text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(model: str, system_prompt: str, user_input: str, language: str, context: str = "") -> str:
+    """
+    Build the cache key for a single model request
+
+    Args:
+        model: Name of the model that answers the request
+        system_prompt: The system prompt sent with the request
+        user_input: The user's input text
+        language: The response language selected in the GUI
+        context: Conversation history sent along with the request, if any
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    parts = [model, hash_text(system_prompt), user_input.strip(), language, hash_text(context)]
+    return hash_text("\x1f".join(parts))
+
+
+class ResponseCache:
+    """SQLite backed key/value cache with TTL expiry and LRU eviction"""
+
+    def __init__(self, path: str = LLM_CACHE_FILE, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # The cache is shared between the GUI thread and worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str, agent: Optional[str] = None) -> Optional[str]:
+        """Return the cached value for key, or None on a miss or expired entry"""
+        agent = agent or "default"
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self._misses[agent] = self._misses.get(agent, 0) + 1
+                return None
+
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._hits[agent] = self._hits.get(agent, 0) + 1
+
+        logger.info(f"LLM cache hit for {agent} (hit rate: {self.hit_rate(agent):.0%})")
+        return row[0]
+
+    def set(self, key: str, value: str):
+        """Store a value and evict old entries if the cache grew past its limits"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, size)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until within limits"""
+        self._conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,))
+
+        count, total_size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            return
+
+        removed = 0
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total_size -= size
+            removed += 1
+        logger.info(f"LLM cache evicted {removed} entries")
+
+    def hit_rate(self, agent: Optional[str] = None) -> float:
+        """Return the hit rate for one agent, or over all agents when agent is None"""
+        if agent is None:
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+        else:
+            hits = self._hits.get(agent, 0)
+            misses = self._misses.get(agent, 0)
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters per agent and the current size of the cache"""
+        with self._lock:
+            count, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            agents = set(self._hits) | set(self._misses)
+            return {
+                "entries": count,
+                "bytes": total_size,
+                "hits": sum(self._hits.values()),
+                "misses": sum(self._misses.values()),
+                "hit_rate": self.hit_rate(),
+                "agents": {
+                    name: {
+                        "hits": self._hits.get(name, 0),
+                        "misses": self._misses.get(name, 0),
+                        "hit_rate": self.hit_rate(name)
+                    }
+                    for name in agents
+                }
+            }
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+product_dedup.py - Collapse near-duplicate Hepsiburada listings
+
+Listings are grouped when they share a Hepsiburada product id or when their
+titles are near-identical (character n-gram vectors compared in bulk with NumPy).
+The cheapest offer of each group is kept.
+"""
+
+import re
+import zlib
+import logging
+import unicodedata
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from product_ranker import parse_price
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 0.85  # Cosine similarity above which two titles are the same product
+NGRAM_SIZE = 3
+VECTOR_DIMENSIONS = 4096  # Hashed n-gram buckets
+
+
+def _strip_diacritics(text: str) -> str:
+    """Remove combining accents (ğ -> g, ş -> s); the dotless ı has none and is kept"""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+# Words that only distinguish variants of the same product
+VARIANT_WORDS = {
+    "siyah", "beyaz", "gri", "gümüş", "mavi", "kırmızı", "yeşil", "mor", "pembe", "altın", "lacivert",
+    "black", "white", "grey", "gray", "silver", "blue", "red", "green", "purple", "pink", "gold",
+    "renk", "color", "colour",
+}
+VARIANT_WORDS = {_strip_diacritics(word) for word in VARIANT_WORDS}
+
+
+def product_code(url: str) -> Optional[str]:
+    """Extract the Hepsiburada product code from a listing URL (…-p-HBCV0000ABCD or …-pm-HBC…)"""
+    if not url:
+        return None
+    match = re.search(r"-pm?-([A-Za-z0-9]+)", url)
+    return match.group(1).upper() if match else None
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase the title, drop punctuation, diacritics and colour/variant words"""
+    text = _strip_diacritics((title or "").lower())
+    # "500 GB" and "500GB" are the same spec
+    text = re.sub(r"(\d)\s+(gb|tb|mb|mhz|ghz|w|inc|inch)\b", r"\1\2", text)
+    tokens = re.findall(r"[a-z0-9ı.]+", text)
+    tokens = [token for token in tokens if token not in VARIANT_WORDS]
+    # Token order varies between sellers, so compare the sorted set
+    return " ".join(sorted(set(tokens)))
+
+
+def spec_signature(normalized_title: str) -> str:
+    """Return the tokens containing digits (capacity, model number, speed) of a normalized title"""
+    return " ".join(token for token in normalized_title.split(" ") if any(char.isdigit() for char in token))
+
+
+def title_vectors(titles: List[str]) -> np.ndarray:
+    """Return L2-normalized hashed character n-gram count vectors, one row per title"""
+    vectors = np.zeros((len(titles), VECTOR_DIMENSIONS), dtype=np.float32)
+    for row, title in enumerate(titles):
+        padded = f" {title} "
+        buckets = [
+            zlib.crc32(padded[i:i + NGRAM_SIZE].encode("utf-8")) % VECTOR_DIMENSIONS
+            for i in range(max(1, len(padded) - NGRAM_SIZE + 1))
+        ]
+        np.add.at(vectors[row], buckets, 1.0)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _find(parents: List[int], index: int) -> int:
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+
+def group_listings(product_list: dict, threshold: float = SIMILARITY_THRESHOLD) -> List[List[str]]:
+    """
+    Group listings that are the same product
+
+    Returns:
+        list: Groups of product ids; groups and ids within them keep the input order
+    """
+    ids = list(product_list)
+    if not ids:
+        return []
+    parents = list(range(len(ids)))
+
+    def union(a: int, b: int):
+        root_a, root_b = _find(parents, a), _find(parents, b)
+        if root_a != root_b:
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    # Same Hepsiburada product code means the same product from another seller
+    seen_codes = {}
+    for index, prod_id in enumerate(ids):
+        code = product_code(product_list[prod_id].get("urun_link", ""))
+        if code:
+            if code in seen_codes:
+                union(seen_codes[code], index)
+            else:
+                seen_codes[code] = index
+
+    # Near-identical titles, compared all-pairs in one matrix product. Titles must also
+    # share the same numeric specs so 500GB and 1TB versions of a model stay apart.
+    titles = [normalize_title(product_list[prod_id].get("urun_adi", "")) for prod_id in ids]
+    vectors = title_vectors(titles)
+    similarity = vectors @ vectors.T
+    signature_ids = {}
+    signatures = np.array([signature_ids.setdefault(spec_signature(title), len(signature_ids)) for title in titles])
+    has_title = np.array([bool(title) for title in titles])
+    candidates = (similarity >= threshold) & (signatures[:, None] == signatures[None, :])
+    pairs = np.argwhere(np.triu(candidates, k=1) & has_title[:, None] & has_title[None, :])
+    for a, b in pairs:
+        union(int(a), int(b))
+
+    groups = {}
+    for index, prod_id in enumerate(ids):
+        groups.setdefault(_find(parents, index), []).append(prod_id)
+    return list(groups.values())
+
+
+def collapse_duplicates(product_list: dict, threshold: float = SIMILARITY_THRESHOLD) -> Tuple[dict, List[int]]:
+    """
+    Keep the cheapest offer of each group of duplicate listings
+
+    The kept listing gets a "benzer_ilan_sayisi" field with the size of its group.
+
+    Returns:
+        tuple: (de-duplicated products keyed by their original ids, group sizes)
+    """
+    groups = group_listings(product_list, threshold)
+    collapsed = {}
+    group_sizes = []
+
+    def price_key(prod_id: str) -> float:
+        price = parse_price(product_list[prod_id].get("fiyat", ""))
+        return price if price is not None else float("inf")
+
+    for group in groups:
+        cheapest = min(group, key=price_key)
+        kept = dict(product_list[cheapest])
+        kept["benzer_ilan_sayisi"] = len(group)
+        collapsed[cheapest] = kept
+        group_sizes.append(len(group))
+
+    # Restore the original listing order
+    collapsed = {prod_id: collapsed[prod_id] for prod_id in product_list if prod_id in collapsed}
+    if len(collapsed) < len(product_list):
+        logger.info(f"Collapsed {len(product_list)} listings into {len(collapsed)} products "
+                    f"(group sizes: {group_sizes})")
+    return collapsed, group_sizes
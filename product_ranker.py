@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+product_ranker.py - Deterministic spec-based ranking of scraped Hepsiburada products
+
+Features are extracted from the product title, brand and price text returned by
+hepsiburada_urunleri_incele and scored with per-category weights (SSD, RAM, CPU).
+"""
+
+import re
+import logging
+from typing import Optional, List, Tuple, Dict
+
+logger = logging.getLogger(__name__)
+
+# Score difference under which the top candidates are considered tied
+TIE_MARGIN = 0.02
+
+# Per-category weights; keys are feature names produced by extract_features
+CATEGORY_WEIGHTS = {
+    "ssd": {
+        "capacity_gb": 0.30,
+        "interface": 0.30,
+        "brand_tier": 0.20,
+        "price_per_gb": 0.20,
+    },
+    "ram": {
+        "capacity_gb": 0.25,
+        "ddr_generation": 0.20,
+        "mhz": 0.20,
+        "dual_channel": 0.10,
+        "brand_tier": 0.15,
+        "price_per_gb": 0.10,
+    },
+    "cpu": {
+        "cpu_generation": 0.35,
+        "cores": 0.20,
+        "ghz": 0.15,
+        "integrated_graphics": 0.05,
+        "brand_tier": 0.10,
+        "price": 0.15,
+    },
+}
+
+# Weight changes applied when the request states a preference, e.g. a follow-up "cheaper one?".
+# Each rule adds weight to features and/or scales existing weights.
+PREFERENCE_RULES = [
+    (r"ucuz|cheap|uygun fiyat|budget|bütçe", {"add": {"price": 0.8}}),
+    (r"en iyi|best|performans|performance|hızlı|faster", {"scale": {"price": 0.25, "price_per_gb": 0.25}}),
+    (r"büyük|daha fazla|kapasite|bigger|larger|more storage|\d+\s*tb", {"scale": {"capacity_gb": 3.0}}),
+]
+
+# Features where a lower value is better
+LOWER_IS_BETTER = {"price", "price_per_gb"}
+
+CATEGORY_KEYWORDS = {
+    "ssd": ["ssd", "nvme", "m.2", "katı hal"],
+    "ram": ["ram", "bellek", "ddr", "memory"],
+    "cpu": ["işlemci", "islemci", "cpu", "processor", "ryzen", "core i3", "core i5", "core i7", "core i9"],
+}
+
+# Reliable brands per category (score 1.0); other known brands score lower, unknown ones 0
+BRAND_TIERS = {
+    "ssd": {
+        "samsung": 1.0, "kingston": 1.0, "crucial": 1.0, "wd": 1.0, "western digital": 1.0,
+        "corsair": 1.0, "sandisk": 0.8, "adata": 0.7, "seagate": 0.8, "lexar": 0.6, "transcend": 0.6,
+        "teamgroup": 0.5, "team": 0.5, "patriot": 0.5, "hiksemi": 0.3, "kioxia": 0.8,
+    },
+    "ram": {
+        "kingston": 1.0, "corsair": 1.0, "g.skill": 1.0, "gskill": 1.0, "crucial": 1.0,
+        "teamgroup": 0.8, "team": 0.8, "patriot": 0.7, "adata": 0.7, "xpg": 0.7,
+        "samsung": 0.9, "goodram": 0.5, "hiksemi": 0.3,
+    },
+    "cpu": {
+        "intel": 1.0, "amd": 1.0,
+    },
+}
+
+# Approximate release era of Ryzen desktop series on the Intel generation scale
+RYZEN_SERIES_TO_GENERATION = {1: 8, 2: 9, 3: 10, 4: 10, 5: 11, 7: 13, 8: 13, 9: 14}
+
+
+def parse_price(price_text: str) -> Optional[float]:
+    """Parse a Turkish formatted price such as '1.299,99 TL' into a float"""
+    if not price_text:
+        return None
+    match = re.search(r"\d{1,3}(?:\.\d{3})*(?:,\d+)?|\d+(?:,\d+)?", price_text)
+    if not match:
+        return None
+    number = match.group(0).replace(".", "").replace(",", ".")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def _capacity_gb(text: str) -> Optional[float]:
+    """Return the largest storage/memory capacity mentioned in the text, in GB"""
+    capacities = []
+    for value, unit in re.findall(r"(\d+(?:[.,]\d+)?)\s*(tb|gb)\b", text):
+        amount = float(value.replace(",", "."))
+        capacities.append(amount * 1000 if unit == "tb" else amount)
+
+    # RAM kits are often written as "2x8GB"; count the whole kit
+    kit = re.search(r"(\d)\s*x\s*(\d+)\s*gb", text)
+    if kit:
+        capacities.append(int(kit.group(1)) * int(kit.group(2)))
+
+    return max(capacities) if capacities else None
+
+
+def _brand(product: dict, title: str, category: str) -> str:
+    """Return the normalized brand of a product, falling back to the title"""
+    brand = (product.get("marka") or "").strip().lower()
+    if brand:
+        return brand
+    for known in BRAND_TIERS.get(category, {}):
+        if re.search(rf"\b{re.escape(known)}\b", title):
+            return known
+    return title.split(" ")[0] if title else ""
+
+
+def _cpu_generation(text: str) -> Optional[float]:
+    """Return the CPU generation on the Intel scale (Ryzen series are mapped onto it)"""
+    intel = re.search(r"i[3579][\s-]*(\d{4,5})", text)
+    if intel:
+        model = intel.group(1)
+        # 5 digit models (12400, 13700) carry a two digit generation
+        return float(model[:2]) if len(model) == 5 else float(model[0])
+
+    ultra = re.search(r"core\s+ultra\s+[579]\s*(\d)\d{2}", text)
+    if ultra:
+        return 14.0 + int(ultra.group(1)) - 1
+
+    ryzen = re.search(r"ryzen\s*[3579]?\s*(\d)\d{3}", text)
+    if ryzen:
+        return float(RYZEN_SERIES_TO_GENERATION.get(int(ryzen.group(1)), 8))
+
+    return None
+
+
+def _has_integrated_graphics(text: str) -> Optional[float]:
+    """Intel models with an F suffix and Ryzen models without a G suffix lack integrated graphics"""
+    intel = re.search(r"i[3579][\s-]*\d{4,5}([a-z]*)", text)
+    if intel:
+        return 0.0 if "f" in intel.group(1) else 1.0
+    ryzen = re.search(r"ryzen\s*[3579]?\s*\d{4}([a-z0-9]*)", text)
+    if ryzen:
+        return 1.0 if "g" in ryzen.group(1) else 0.0
+    return None
+
+
+def extract_features(product: dict, category: str) -> Dict[str, Optional[float]]:
+    """
+    Extract numeric ranking features from a scraped product
+
+    Args:
+        product: Product dict with urun_adi, fiyat and marka fields
+        category: One of the CATEGORY_WEIGHTS keys
+
+    Returns:
+        dict: Feature name to value, None where the feature could not be read
+    """
+    title = (product.get("urun_adi") or "").lower()
+    price = parse_price(product.get("fiyat", ""))
+    capacity = _capacity_gb(title)
+
+    interface = None
+    if "nvme" in title or "pcie" in title:
+        interface = 1.0
+    elif "m.2" in title or "m2" in title:
+        interface = 0.6  # M.2 form factor without NVMe is usually SATA
+    elif "sata" in title or re.search(r'2[.,]5\s*(?:"|inç|inch)', title):
+        interface = 0.3
+
+    ddr = re.search(r"ddr(\d)", title)
+    mhz = re.search(r"(\d{4})\s*mhz", title)
+    cores = re.search(r"(\d+)\s*(?:çekirdek|cekirdek|core\b|cores)", title)
+    ghz = re.findall(r"(\d+(?:[.,]\d+)?)\s*ghz", title)
+
+    brand = _brand(product, title, category)
+    brand_tier = BRAND_TIERS.get(category, {}).get(brand, 0.0)
+
+    return {
+        "price": price,
+        "capacity_gb": capacity,
+        "price_per_gb": price / capacity if price and capacity else None,
+        "interface": interface,
+        "ddr_generation": float(ddr.group(1)) if ddr else None,
+        "mhz": float(mhz.group(1)) if mhz else None,
+        "dual_channel": 1.0 if re.search(r"\dx\d|\bkit\b|dual", title) else 0.0,
+        "cpu_generation": _cpu_generation(title),
+        "cores": float(cores.group(1)) if cores else None,
+        "ghz": max(float(v.replace(",", ".")) for v in ghz) if ghz else None,
+        "integrated_graphics": _has_integrated_graphics(title),
+        "brand_tier": brand_tier,
+    }
+
+
+def apply_preferences(weights: Dict[str, float], user_input: str) -> Dict[str, float]:
+    """Scale category weights by the preferences stated in the user's request"""
+    text = user_input.lower()
+    adjusted = dict(weights)
+    for pattern, changes in PREFERENCE_RULES:
+        if re.search(pattern, text):
+            for feature, extra in changes.get("add", {}).items():
+                adjusted[feature] = adjusted.get(feature, 0.0) + extra
+            for feature, multiplier in changes.get("scale", {}).items():
+                if feature in adjusted:
+                    adjusted[feature] *= multiplier
+    return adjusted
+
+
+def detect_category(user_input: str, product_list: dict) -> Optional[str]:
+    """Guess the product category from the user's request and the scraped titles"""
+    texts = [user_input.lower()] + [(p.get("urun_adi") or "").lower() for p in product_list.values()]
+    scores = {}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        scores[category] = sum(1 for text in texts for keyword in keywords if keyword in text)
+
+    best = max(scores, key=scores.get)
+    if scores[best] == 0:
+        return None
+    return best
+
+
+def score_products(product_list: dict, category: str,
+                   weights: Optional[Dict[str, float]] = None) -> List[Tuple[str, float]]:
+    """
+    Score every product in the list with the category weights
+
+    Each feature is min-max normalized across the candidates so weights are comparable;
+    products missing a feature get no credit for it.
+
+    Returns:
+        list: (product_id, score) tuples sorted from best to worst
+    """
+    weights = weights or CATEGORY_WEIGHTS[category]
+    features = {pid: extract_features(p, category) for pid, p in product_list.items()}
+
+    scores = {pid: 0.0 for pid in product_list}
+    for feature, weight in weights.items():
+        values = [f[feature] for f in features.values() if f.get(feature) is not None]
+        if not values:
+            continue
+        low, high = min(values), max(values)
+        for pid, f in features.items():
+            value = f.get(feature)
+            if value is None:
+                continue
+            normalized = 1.0 if high == low else (value - low) / (high - low)
+            if feature in LOWER_IS_BETTER:
+                normalized = 1.0 - normalized if high != low else 1.0
+            scores[pid] += weight * normalized
+
+    # Stable ordering for equal scores keeps the ranking reproducible
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def rank_products(product_list: dict, user_input: str,
+                  weights: Optional[Dict[str, Dict[str, float]]] = None) -> Tuple[Optional[str], List[str]]:
+    """
+    Rank products locally and report whether the model needs to break a tie
+
+    Args:
+        product_list: Scraped products keyed by id (urun_1, urun_2, ...)
+        user_input: The user's original request, used to detect the category
+        weights: Optional per-category weight overrides
+
+    Returns:
+        tuple: (selected product id or None, ids the model should choose between).
+               The second element is empty when the local ranking is decisive.
+    """
+    candidates = {pid: p for pid, p in product_list.items() if p.get("urun_adi")}
+    if not candidates:
+        return None, []
+
+    category = detect_category(user_input, candidates)
+    if category is None:
+        logger.info("Product category unknown, deferring selection to the model")
+        return None, list(candidates)
+
+    category_weights = (weights or {}).get(category) or CATEGORY_WEIGHTS[category]
+    ranking = score_products(candidates, category, apply_preferences(category_weights, user_input))
+    best_id, best_score = ranking[0]
+    tied = [pid for pid, score in ranking if best_score - score <= TIE_MARGIN]
+
+    logger.info(f"Ranked {len(ranking)} {category} products, best: {best_id} ({best_score:.3f})")
+    if len(tied) > 1:
+        return None, tied
+    return best_id, []
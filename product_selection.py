@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+product_selection.py - Map-reduce product selection over large candidate sets
+
+Candidates are split into chunks that fit the prompt token budget, each chunk is
+ranked by a parallel model call and the chunk winners go through a final round.
+A deadline bounds the whole selection; when it runs out the best result so far is
+returned.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from gemini_async import AsyncGeminiChatBot, GeminiRequestError
+from prompt_codec import PRODUCT_PROMPT_TOKEN_BUDGET, chunk_products, decode_selection, encode_products
+
+logger = logging.getLogger(__name__)
+
+MAP_CONCURRENCY = 4  # Parallel chunk calls per selection
+SELECTION_DEADLINE = 15.0  # Seconds for the whole selection
+
+
+async def _select_chunk(client: AsyncGeminiChatBot, chunk: dict, system_prompt: str, language: str,
+                        semaphore: asyncio.Semaphore, timeout: float) -> Optional[str]:
+    """Ask the model for the best product id of one chunk"""
+    table, row_to_id = encode_products(chunk)
+    async with semaphore:
+        try:
+            response = await client.process_request(table, system_prompt, agent="item_selector",
+                                                    language=language, timeout=timeout)
+        except GeminiRequestError as e:
+            logger.warning(f"Chunk selection failed: {e}")
+            return None
+    product_id = decode_selection(response, row_to_id)
+    if product_id is None:
+        logger.warning(f"Chunk selection returned unknown product {response.strip()}")
+    return product_id
+
+
+async def select_map_reduce(client: AsyncGeminiChatBot, product_list: dict, system_prompt: str,
+                            language: str = "English", budget: int = PRODUCT_PROMPT_TOKEN_BUDGET,
+                            concurrency: int = MAP_CONCURRENCY,
+                            deadline: float = SELECTION_DEADLINE) -> Optional[str]:
+    """
+    Select one product id from any number of candidates
+
+    Args:
+        client: Async Gemini client used for the chunk and final calls
+        product_list: Candidates keyed by id, best locally ranked first
+        system_prompt: The product selection system prompt
+        language: Response language, part of the cache key
+        budget: Token budget of one selection prompt
+        concurrency: Maximum parallel chunk calls
+        deadline: Seconds before the best result so far is returned
+
+    Returns:
+        Optional[str]: The selected product id, or None if there are no candidates
+    """
+    if not product_list:
+        return None
+
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Candidates arrive in local rank order, so the first one is the fallback answer
+    best_so_far = next(iter(product_list))
+    candidates = product_list
+    round_number = 1
+
+    while len(candidates) > 1:
+        remaining = end - loop.time()
+        if remaining <= 0:
+            logger.warning("Product selection deadline reached, returning best result so far")
+            break
+
+        chunks = chunk_products(candidates, system_prompt, budget)
+        if len(chunks) >= len(candidates):
+            # One candidate per chunk would repeat the same round until the deadline
+            logger.warning(f"{len(candidates)} candidates do not fit the budget together, "
+                           "selecting in one over-budget round")
+            chunks = [candidates]
+        tasks = [
+            asyncio.ensure_future(_select_chunk(client, chunk, system_prompt, language, semaphore, remaining))
+            for chunk in chunks
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=remaining)
+        for task in pending:
+            task.cancel()
+
+        # Keep chunk order so earlier (better ranked) chunks win ties between rounds
+        winners = [task.result() for task in tasks if task in done and task.result()]
+        logger.info(f"Selection round {round_number}: {len(chunks)} chunks, "
+                    f"{len(winners)} winners, {len(pending)} timed out")
+        if not winners:
+            break
+
+        best_so_far = winners[0]
+        if pending:
+            logger.warning("Product selection deadline reached, returning best result so far")
+            break
+        if len(chunks) == 1:
+            # The final round covered all remaining candidates
+            return winners[0]
+
+        candidates = {prod_id: product_list[prod_id] for prod_id in winners}
+        round_number += 1
+
+    return best_so_far
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+prompt_codec.py - Compact product encoding and token accounting for model prompts
+"""
+
+import re
+import logging
+import threading
+from typing import Dict, List, Tuple, Optional
+
+from product_ranker import parse_price
+
+logger = logging.getLogger(__name__)
+
+# Maximum estimated tokens for one product selection prompt (system prompt + candidates)
+PRODUCT_PROMPT_TOKEN_BUDGET = 2000
+# Candidate table tokens allowed per chunk even when a long system prompt leaves less of the budget
+MIN_CHUNK_TOKENS = 500
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in text without a network round trip
+
+    Gemini averages about four characters per token for English; non-ASCII
+    characters (Turkish, Russian) tokenize worse, so they are counted double.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return max(1, (len(text) + non_ascii) // 4)
+
+
+def _format_price(price_text: str) -> str:
+    """Return the price as a bare number so the currency unit is stated once in the header"""
+    price = parse_price(price_text)
+    if price is None:
+        return "?"
+    return str(int(price)) if price == int(price) else f"{price:.2f}"
+
+
+def encode_products(product_list: dict) -> Tuple[str, Dict[str, str]]:
+    """
+    Encode products as a compact pipe-separated table
+
+    Brands are replaced with short codes listed once below the table, the currency
+    unit is moved into the header and the brand is removed from the start of titles.
+    Rows are numbered from 1; the model answers with a row number.
+
+    Args:
+        product_list: Products keyed by id (urun_1, urun_2, ...)
+
+    Returns:
+        tuple: (encoded table, mapping of row number to original product id)
+    """
+    brand_codes: Dict[str, Tuple[str, str]] = {}
+    rows = ["#|ad|fiyat(TL)|m"]
+    row_to_id = {}
+
+    for row_number, (prod_id, prod_info) in enumerate(product_list.items(), start=1):
+        title = (prod_info.get("urun_adi") or "").strip()
+        brand = (prod_info.get("marka") or "").strip()
+
+        code = ""
+        if brand:
+            key = brand.lower()
+            if key not in brand_codes:
+                brand_codes[key] = (f"b{len(brand_codes) + 1}", brand)
+            code = brand_codes[key][0]
+            # The brand is already in the m column, drop it from the title
+            title = re.sub(rf"^{re.escape(brand)}\s*", "", title, flags=re.IGNORECASE)
+
+        title = title.replace("|", "/")
+        rows.append(f"{row_number}|{title}|{_format_price(prod_info.get('fiyat', ''))}|{code}")
+        row_to_id[str(row_number)] = prod_id
+
+    if brand_codes:
+        rows.append("m: " + " ".join(f"{code}={name}" for code, name in brand_codes.values()))
+
+    return "\n".join(rows), row_to_id
+
+
+def decode_selection(response: str, row_to_id: Dict[str, str]) -> Optional[str]:
+    """Map the model's answer (a row number, possibly wrapped in text) back to a product id"""
+    if not response:
+        return None
+    answer = response.strip().strip('"\'`')
+    if answer in row_to_id.values():
+        return answer
+    match = re.search(r"\d+", answer)
+    if match:
+        return row_to_id.get(match.group(0))
+    return None
+
+
+def chunk_products(product_list: dict, system_prompt: str,
+                   budget: int = PRODUCT_PROMPT_TOKEN_BUDGET) -> List[dict]:
+    """
+    Split products into chunks whose encoded prompt stays within the token budget
+
+    The order of products is kept, so if the list is ranked the best candidates end
+    up in the first chunk. A single product larger than the budget gets a chunk of its own.
+    """
+    # A long user request embedded in the system prompt must not shrink chunks to one product each
+    available = max(budget - estimate_tokens(system_prompt), MIN_CHUNK_TOKENS)
+    chunks: List[dict] = []
+    current: dict = {}
+
+    for prod_id, prod_info in product_list.items():
+        candidate = dict(current)
+        candidate[prod_id] = prod_info
+        if current and estimate_tokens(encode_products(candidate)[0]) > available:
+            chunks.append(current)
+            current = {prod_id: prod_info}
+        else:
+            current = candidate
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TokenUsageLog:
+    """Per-agent totals of estimated prompt and response tokens"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    def record(self, agent: Optional[str], prompt_tokens: int, response_tokens: int):
+        """Add one call's token counts to the agent's totals and log them"""
+        agent = agent or "default"
+        with self._lock:
+            usage = self._usage.setdefault(agent, {"calls": 0, "prompt_tokens": 0, "response_tokens": 0})
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["response_tokens"] += response_tokens
+        logger.info(f"{agent} tokens: prompt={prompt_tokens}, response={response_tokens}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return a copy of the per-agent token totals"""
+        with self._lock:
+            return {agent: dict(usage) for agent, usage in self._usage.items()}
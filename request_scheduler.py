@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+request_scheduler.py - Runs chat requests concurrently on a shared thread pool
+
+Each request gets an id, is routed to an agent and then runs under that agent's
+concurrency limit, so a slow shopping request (one browser at a time) does not
+hold up weather or chat questions. Requests waiting for a slot of their agent are
+parked in a per-agent queue instead of blocking a pool thread. Progress (streamed
+text, partial results such as scraped products) is reported through Qt signals
+carrying the request id, which Qt delivers on the GUI thread.
+"""
+
+import itertools
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 6
+DEFAULT_AGENT_CONCURRENCY = 2
+# Requests of one agent type allowed to run at the same time
+AGENT_CONCURRENCY = {
+    "e_ticaret": 1,  # Drives a real browser
+    "image_analysis": 2,
+    "weather_gether": 4,
+    "friend_chat": 4,
+}
+
+
+class AgentLimiter:
+    """Per-agent-type concurrency limits, shared by everything that runs agents"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self._limits = dict(AGENT_CONCURRENCY if limits is None else limits)
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, agent: str) -> Iterator[None]:
+        """Wait for a free slot of agent and hold it for the duration of the block"""
+        self.acquire(agent)
+        try:
+            yield
+        finally:
+            self.release(agent)
+
+    def acquire(self, agent: str, blocking: bool = True) -> bool:
+        """Take a slot of agent; without blocking, return False if none is free"""
+        if not self._semaphore(agent).acquire(blocking):
+            return False
+        with self._lock:
+            self._running[agent] = self._running.get(agent, 0) + 1
+        return True
+
+    def release(self, agent: str):
+        """Give back a slot taken with acquire"""
+        with self._lock:
+            self._running[agent] -= 1
+        self._semaphore(agent).release()
+
+    def in_flight(self) -> Dict[str, int]:
+        """Return the number of running requests per agent type"""
+        with self._lock:
+            return {agent: count for agent, count in self._running.items() if count}
+
+    def _semaphore(self, agent: str) -> threading.Semaphore:
+        with self._lock:
+            if agent not in self._semaphores:
+                self._semaphores[agent] = threading.Semaphore(self._limits.get(agent, DEFAULT_AGENT_CONCURRENCY))
+            return self._semaphores[agent]
+
+
+class RequestScheduler(QObject):
+    """Thread pool of chat requests with per-agent concurrency limits"""
+
+    routed = pyqtSignal(int, str)  # request id, agent type
+    chunk = pyqtSignal(int, str)  # request id, streamed text
+    progress = pyqtSignal(int, object)  # request id, partial result published by the agent
+    finished = pyqtSignal(int, object)  # request id, (agent type, result)
+    failed = pyqtSignal(int, str)  # request id, error message
+
+    def __init__(self, max_workers: int = MAX_WORKERS, limits: Optional[Dict[str, int]] = None, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="request")
+        self.limiter = AgentLimiter(limits)
+        self._ids = itertools.count(1)
+        self._waiting: Dict[str, Deque[Tuple[int, Callable[..., Any]]]] = {}  # Routed, waiting for a slot
+        self._lock = threading.Lock()
+
+    def submit(self, route: Callable[[], str], run: Callable[..., Any]) -> int:
+        """
+        Schedule a request
+
+        Args:
+            route: Picks the agent type for the request; runs on the pool
+            run: Runs the agent with (agent type, chunk callback, progress callback)
+                 and returns its result
+
+        Returns:
+            int: The request id used in every signal about this request
+        """
+        request_id = next(self._ids)
+        self._executor.submit(self._execute, request_id, route, run)
+        return request_id
+
+    def in_flight(self) -> Dict[str, int]:
+        """Return the number of running requests per agent type"""
+        return self.limiter.in_flight()
+
+    def shutdown(self):
+        """Drop queued requests; running ones finish in the background"""
+        with self._lock:
+            self._waiting.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _execute(self, request_id: int, route: Callable[[], str], run: Callable[..., Any]):
+        try:
+            agent = route()
+            self.routed.emit(request_id, agent)
+        except Exception as e:
+            logger.error(f"Error in request {request_id}: {e}")
+            self.failed.emit(request_id, str(e))
+            return
+
+        with self._lock:
+            if not self.limiter.acquire(agent, blocking=False):
+                # Park the request so the thread can serve other agents; a finishing request resubmits it
+                self._waiting.setdefault(agent, deque()).append((request_id, run))
+                return
+        self._run(request_id, agent, run)
+
+    def _run(self, request_id: int, agent: str, run: Callable[..., Any]):
+        """Run a routed request that holds a slot of its agent"""
+        try:
+            result = run(agent, lambda text: self.chunk.emit(request_id, text),
+                         lambda item: self.progress.emit(request_id, item))
+            self.finished.emit(request_id, (agent, result))
+        except Exception as e:
+            logger.error(f"Error in request {request_id}: {e}")
+            self.failed.emit(request_id, str(e))
+        finally:
+            self._release(agent)
+
+    def _release(self, agent: str):
+        """Hand the agent slot to the next waiting request of that agent, or free it"""
+        with self._lock:
+            waiting = self._waiting.get(agent)
+            if not waiting:
+                self.limiter.release(agent)
+                return
+            request_id, run = waiting.popleft()
+
+        try:
+            self._executor.submit(self._run, request_id, agent, run)
+        except RuntimeError:
+            # Shut down while the request was waiting
+            self.limiter.release(agent)
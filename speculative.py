@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+speculative.py - Speculative browser warm-up while the request is being routed
+
+The browser is started (and, when the search term can be guessed locally, the
+search page opened) as soon as a message is submitted. If routing confirms the
+e_ticaret agent the warm driver is handed to the scraper, otherwise it is discarded.
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_ENABLED = True
+MAX_SPECULATIONS = 2  # Concurrent warm-ups; each one is a Chrome process
+
+# Local guesses of the e_ticaret search term, checked in order
+SEARCH_TERM_RULES = [
+    (r"\bssd\b|hdd|hard ?disk|yava[sş]|geç açıl|boot|slow", "SSD"),
+    (r"\bram\b|bellek|memory|ddr\d", "RAM"),
+    (r"i[sş]lemci|\bcpu\b|processor|ryzen|intel", "işlemci"),
+]
+
+
+def predict_search_term(user_input: str) -> Optional[str]:
+    """Guess the product search term from the message without calling the model"""
+    text = user_input.lower()
+    for pattern, term in SEARCH_TERM_RULES:
+        if re.search(pattern, text):
+            return term
+    return None
+
+
+def normalize_term(term: Optional[str]) -> str:
+    """Normalize a search term for comparing the prediction with the model's answer"""
+    return re.sub(r"[\"'`.]", "", term or "").strip().casefold()
+
+
+class Speculation:
+    """A single in-flight browser warm-up that can be committed or cancelled"""
+
+    def __init__(self, executor: "SpeculativeExecutor", predicted_term: Optional[str]):
+        self.executor = executor
+        self.predicted_term = predicted_term
+        self.started_at = time.monotonic()
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._settled = False
+
+    def _warm_up(self):
+        """Start the browser and open the predicted search; runs on the executor"""
+        # Selenium is only imported once a shopping request may be coming
+        from hepsiburada_data_gether import tarayici_baslat, arama_sayfasini_ac
+
+        driver = tarayici_baslat()
+        opened_term = None
+        if self.predicted_term:
+            try:
+                arama_sayfasini_ac(driver, self.predicted_term)
+                opened_term = self.predicted_term
+            except Exception as e:
+                logger.warning(f"Speculative search for '{self.predicted_term}' failed: {e}")
+        return driver, opened_term
+
+    def commit(self, search_term: str) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Take over the warm driver for the confirmed search term
+
+        Returns:
+            tuple: (driver or None, the search term already open in the driver or None).
+                   The caller owns the returned driver and must quit it.
+        """
+        with self._lock:
+            if self._settled:
+                return None, None
+            self._settled = True
+
+        try:
+            driver, opened_term = self.future.result()
+        except Exception as e:
+            logger.warning(f"Speculative browser warm-up failed: {e}")
+            self.executor.record("failed")
+            return None, None
+
+        if opened_term and normalize_term(opened_term) == normalize_term(search_term):
+            self.executor.record("search_hit")
+            # Report the confirmed spelling so the scraper skips reloading the page
+            return driver, search_term
+
+        self.executor.record("browser_hit" if not opened_term else "search_miss")
+        return driver, None
+
+    def cancel(self):
+        """Discard the speculation, quitting the browser once it has started"""
+        with self._lock:
+            if self._settled:
+                return
+            self._settled = True
+
+        if self.future.cancel():
+            self.executor.record("cancelled", 0.0)
+            return
+
+        def discard(future: Future):
+            wasted = time.monotonic() - self.started_at
+            try:
+                driver, _ = future.result()
+                driver.quit()
+            except Exception as e:
+                logger.debug(f"Discarded speculative browser: {e}")
+            self.executor.record("cancelled", wasted)
+
+        self.future.add_done_callback(discard)
+
+
+class SpeculativeExecutor:
+    """Runs browser warm-ups in the background and tracks hit rate and wasted work"""
+
+    def __init__(self, max_workers: int = MAX_SPECULATIONS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self.metrics = {
+            "started": 0,
+            "search_hit": 0,   # Committed with the predicted search page already open
+            "browser_hit": 0,  # Committed, browser reused, no prediction was made
+            "search_miss": 0,  # Committed, but the predicted search term was wrong
+            "cancelled": 0,    # Routing chose another agent
+            "failed": 0,
+            "wasted_seconds": 0.0,
+        }
+
+    def start(self, user_input: str) -> Optional[Speculation]:
+        """Begin warming a browser for the message, or return None if speculation is off"""
+        if not SPECULATION_ENABLED:
+            return None
+
+        speculation = Speculation(self, predict_search_term(user_input))
+        speculation.future = self._pool.submit(speculation._warm_up)
+        self.record("started")
+        logger.info(f"Speculative browser warm-up started (predicted term: {speculation.predicted_term})")
+        return speculation
+
+    def record(self, outcome: str, wasted_seconds: float = 0.0):
+        with self._lock:
+            self.metrics[outcome] += 1
+            self.metrics["wasted_seconds"] += wasted_seconds
+
+    def hit_rate(self) -> float:
+        """Share of finished speculations whose browser was used by the scraper"""
+        with self._lock:
+            used = self.metrics["search_hit"] + self.metrics["browser_hit"] + self.metrics["search_miss"]
+            finished = used + self.metrics["cancelled"] + self.metrics["failed"]
+        return used / finished if finished else 0.0
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
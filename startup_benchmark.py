@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+startup_benchmark.py - Measure Tetra's cold start
+
+Reports the import time of each module loaded by tetra.py (from python -X importtime)
+and the time from launching the interpreter until the main window has been shown.
+Exits with status 1 when the median time-to-window exceeds the budget, so a library
+that sneaks back into the startup path is caught.
+
+Usage: python startup_benchmark.py [--runs 5] [--budget-ms 1000] [--top 15]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from typing import List, Tuple
+
+STARTUP_BUDGET_MS = 1000  # Median time-to-window allowed; importing every library costs over 2 s
+DEFAULT_RUNS = 5
+DEFAULT_TOP = 15
+WINDOW_TIMEOUT = 60  # Seconds before a run is considered hung
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Run in a child interpreter: build the window, show it and report once it is on screen
+WINDOW_SCRIPT = """
+import sys
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+import tetra
+window = tetra.ChatBotGUI()
+window.show()
+app.processEvents()
+print("WINDOW_SHOWN", flush=True)
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    # Children run in a scratch directory so the window's caches and session log stay out of the
+    # user's cache/ (session log pruning would delete real logs); tetra is imported from here
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, env.get("PYTHONPATH")]))
+    # No real keys are needed to show the window; .env values still take precedence
+    env.setdefault("Gemini_Api_Key", "startup-benchmark")
+    env.setdefault("Weather_Api_Key", "startup-benchmark")
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def import_times(workdir: str) -> List[Tuple[str, int, float]]:
+    """Import tetra in a fresh interpreter; return (module, depth, cumulative ms) in import order"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import tetra"],
+                            cwd=workdir, env=child_env(), capture_output=True, text=True,
+                            timeout=WINDOW_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing tetra failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            modules.append((match.group(4), depth, int(match.group(2)) / 1000))
+    return modules
+
+
+def time_to_window(workdir: str) -> float:
+    """Milliseconds from starting the interpreter until the main window was shown"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", WINDOW_SCRIPT], cwd=workdir, env=child_env(),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    shown_at = []
+    shown = threading.Event()
+
+    def watch():
+        for line in process.stdout:
+            if line.strip() == "WINDOW_SHOWN":
+                shown_at.append(time.perf_counter())
+                shown.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        # A modal dialog (e.g. a startup error) would otherwise block the run forever
+        if not shown.wait(WINDOW_TIMEOUT):
+            raise RuntimeError(f"The window was not shown within {WINDOW_TIMEOUT} s; "
+                               "run tetra.py directly to see what blocks startup")
+        return (shown_at[0] - start) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure Tetra's import time and time-to-window")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Window launches to take the median of")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="Allowed median time-to-window")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="tetra-benchmark-") as workdir:
+        modules = import_times(workdir)
+        timings = [time_to_window(workdir) for _ in range(args.runs)]
+
+    # Children are listed before their parent, so tetra's direct imports precede its own line
+    end = next(i for i, (name, depth, ms) in enumerate(modules) if name == "tetra" and depth == 0)
+    start = max((i + 1 for i, (name, depth, ms) in enumerate(modules[:end]) if depth == 0), default=0)
+    direct = [(name, ms) for name, depth, ms in modules[start:end] if depth == 1]
+    print(f"import tetra: {modules[end][2]:.1f} ms")
+    print("Slowest imports by tetra (cumulative):")
+    for name, ms in sorted(direct, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    median = statistics.median(timings)
+    print(f"Time to window: median {median:.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    if median > args.budget_ms:
+        print(f"FAIL: startup is {median - args.budget_ms:.0f} ms over budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,29 +5,39 @@ import sys
 import logging
 import re
 import time
+import importlib
+import threading
+from collections import OrderedDict
 import xml.etree.ElementTree as ET
-import io
-import base64
-from typing import Optional, Tuple, Union
+from typing import Optional, Tuple, Union, Iterator, Callable, List
 
-import pygame
-import requests
 from dotenv import load_dotenv
-import google.generativeai as genai
-from gtts import gTTS
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-                           QLabel, QComboBox, QTextEdit, QLineEdit, QPushButton,
+                           QLabel, QComboBox, QLineEdit, QPushButton,
                            QMessageBox, QGraphicsBlurEffect, QStackedLayout, 
                            QFileDialog, QSizePolicy)
-from PyQt5.QtGui import QPixmap, QFont, QIcon, QImage
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QByteArray, QBuffer
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from PIL import Image
-
-from hepsiburada_data_gether import hepsiburada_urunleri_incele
-from hepsiburada_buy import open_url_with_webdriver
+from PyQt5.QtGui import QPixmap, QFont, QIcon, QImage, QPainter
+from PyQt5.QtCore import Qt, QThread, QTimer, QSize, pyqtSignal
+
+from image_pipeline import PreparedImage, prepare_image
+from image_cache import ImageAnalysisCache, make_image_question_key
+from weather_client import WeatherClient
+from audio_service import AudioService
+from tts_cache import ClipCache
+from city_gazetteer import find_cities
+from weather_report import MAX_CITIES, fetch_forecasts, forecast_horizon, format_comparison
+from image_batch import (MAX_BATCH_IMAGES, BatchAnalysis, analyze_fan_out, build_batch_parts,
+                         fits_single_request, split_sections)
+from llm_cache import ResponseCache, make_cache_key
+from gemini_async import MODEL_NAME, AsyncGeminiChatBot, GeminiRequestError, load_genai
+from product_ranker import rank_products
+from speculative import SpeculativeExecutor, normalize_term
+from request_scheduler import RequestScheduler
+from chat_history import SYSTEM, ChatHistoryModel, ChatHistoryView, SessionLog
+from conversation_memory import ConversationMemory, USER, ASSISTANT
+from product_selection import SELECTION_DEADLINE, select_map_reduce
+from prompt_codec import (PRODUCT_PROMPT_TOKEN_BUDGET, TokenUsageLog, chunk_products,
+                          decode_selection, encode_products, estimate_tokens)
 
 # Configure logging
 logging.basicConfig(
@@ -38,9 +48,36 @@ logger = logging.getLogger(__name__)
 
 # Global variables
 language = "English"  # Default language
-ICON_PATH = "./"
-TEMP_VOICE_DIR = "temp_voice"
-TEMP_IMAGE_DIR = "temp_image"
+ICON_PATH = os.path.dirname(os.path.abspath(__file__))  # Bundled images live next to this file
+ICON_FILE = os.path.join(ICON_PATH, "tetra.png")
+
+# Agents whose answers should always be generated fresh instead of served from the cache
+CACHE_BYPASS_AGENTS = {"friend_chat"}
+# History turns (the last user/assistant exchange) in the cache key of routing, search term and city calls
+CACHE_CONTEXT_TURNS = 2
+
+# Agents whose answers are streamed into the chat display as they are generated
+STREAMING_ENABLED = True
+STREAMING_AGENTS = {"friend_chat", "image_analysis"}
+STREAM_FLUSH_INTERVAL_MS = 16  # Flush streamed text at most once per frame
+THUMBNAIL_CACHE_SIZE = 16  # Prepared images and previews kept by (path, mtime)
+THUMBNAIL_SPACING = 6  # Pixels between thumbnails of a multi-image preview
+
+# Heavy libraries are imported on first use; once the window is shown they are loaded
+# in the background, most likely needed first, so the first request rarely waits for them
+PREWARM_ENABLED = True
+PREWARM_MODULES = [
+    "langchain_google_genai", "langchain_core.prompts", "langchain_core.output_parsers",
+    "langchain_core.messages", "google.generativeai", "google.api_core.exceptions",
+    "requests", "PIL.Image", "pygame", "gtts", "numpy", "selenium.webdriver",
+]
+
+# Shown in place of a request's answer once it has been routed
+AGENT_LOADING_MESSAGES = {
+    "e_ticaret": "Searching Hepsiburada...",
+    "weather_gether": "Fetching weather information...",
+    "image_analysis": "Analyzing your image...",
+}
 
 # Language mappings
 PLACEHOLDER_TEXTS = {
@@ -79,6 +116,13 @@ IMAGE_BUTTON_TEXTS = {
     "Russian": "Загрузить Изображение"
 }
 
+# Fixed spoken lines; pre-synthesized for every voice language at startup
+VOICE_PHRASES = {
+    "products_found": "İhtiyacınıza uygun ürünleri buldum. Detaylar sohbet penceresinde.",
+    "image_done": "Image analysis completed. Check the chat window for details.",
+    "unknown_request": "Bu tür istekleri nasıl işleyeceğimden emin değilim.",
+}
+
 VOICE_LANG_MAP = {
     "English": "en",
     "Turkish": "tr",
@@ -100,156 +144,216 @@ def load_env_variables() -> Tuple[str, str]:
     return gemini_api, weather_api
 
 
-def play_voice(text: str, volume: float = 1.0, lang: str = "en"):
-    """Generate and play text-to-speech audio"""
-    # Create temp_voice directory if it doesn't exist
-    if not os.path.exists(TEMP_VOICE_DIR):
-        os.makedirs(TEMP_VOICE_DIR)
-
-    voice_file = os.path.join(TEMP_VOICE_DIR, "voice.mp3")
-    
-    try:
-        # Generate and save the speech file
-        tts = gTTS(text, lang=lang)
-        tts.save(voice_file)
-
-        # Initialize pygame mixer
-        pygame.mixer.init()
-
-        # Load the audio file
-        pygame.mixer.music.load(voice_file)
-
-        # Set volume (0.0 to 1.0)
-        pygame.mixer.music.set_volume(min(1.0, max(0.0, volume)))
-
-        # Start playing
-        pygame.mixer.music.play()
-
-        # Wait for playback to finish
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.01)
-
-    except Exception as e:
-        logger.error(f"Error playing voice: {e}")
-    finally:
-        # Cleanup
-        pygame.quit()
-
-        # Remove temporary file
-        if os.path.exists(voice_file):
-            os.remove(voice_file)
+def prewarm_modules(modules: List[str] = PREWARM_MODULES):
+    """Import modules one after another, logging how long each took"""
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Pre-warm import of {name} failed: {e}")
+            continue
+        logger.info(f"Pre-warmed {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
 
 
-def save_temp_image(image_path: str) -> str:
-    """Save a temporary copy of the uploaded image"""
-    # Create temp image directory if it doesn't exist
-    if not os.path.exists(TEMP_IMAGE_DIR):
-        os.makedirs(TEMP_IMAGE_DIR)
+def format_history(history: Optional[list]) -> str:
+    """Render (role, text) conversation turns as plain text"""
+    if not history:
+        return ""
+    return "\n".join(f"{role}: {text}" for role, text in history)
 
-    # Generate a unique filename based on timestamp
-    filename = f"temp_image_{int(time.time())}{os.path.splitext(image_path)[1]}"
-    temp_path = os.path.join(TEMP_IMAGE_DIR, filename)
-    
-    try:
-        # Open and save the image using PIL for better compatibility
-        img = Image.open(image_path)
-        img.save(temp_path)
-        return temp_path
-    except Exception as e:
-        logger.error(f"Error saving temporary image: {e}")
-        return None
 
+def cache_context(history: Optional[list], turns: Optional[int] = None) -> str:
+    """
+    Render the part of the history that goes into a response cache key
 
-def encode_image_to_base64(image_path: str) -> Optional[str]:
-    """Encode image to base64 for Gemini API"""
-    try:
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-    except Exception as e:
-        logger.error(f"Error encoding image: {e}")
-        return None
+    Routing, search term and city extraction only resolve follow-ups against the last
+    exchange, so they pass CACHE_CONTEXT_TURNS; keying them on the whole history would
+    make them miss the cache for every turn of a conversation.
+    """
+    if not history or turns == 0:
+        return ""
+    return format_history(history if turns is None else history[-turns:])
 
 
 class GeminiChatBot:
     """Gemini API wrapper to handle chat interactions"""
     
-    def __init__(self):
-        self.api_key, _ = load_env_variables()
-        self._initialize_model()
-
-    def _initialize_model(self):
-        """Configure the Gemini API with API key"""
-        genai.configure(api_key=self.api_key)
+    def __init__(self, response_cache: Optional[ResponseCache] = None,
+                 image_cache: Optional[ImageAnalysisCache] = None):
+        self.api_key, self.weather_api_key = load_env_variables()
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.image_cache = image_cache if image_cache is not None else ImageAnalysisCache()
+        self._async_client = None
+        self._weather_client = None
+        self.token_usage = TokenUsageLog()
+
+    @property
+    def async_client(self) -> AsyncGeminiChatBot:
+        """Asyncio client sharing this bot's API key and response cache"""
+        if self._async_client is None:
+            self._async_client = AsyncGeminiChatBot(self.api_key, response_cache=self.response_cache)
+        return self._async_client
+
+    @property
+    def weather_client(self) -> WeatherClient:
+        """Weather client with a pooled HTTP session and forecast cache"""
+        if self._weather_client is None:
+            self._weather_client = WeatherClient(self.weather_api_key)
+        return self._weather_client
         
-    def process_request(self, user_input: str, system_prompt: str) -> Optional[str]:
+    def process_request(self, user_input: str, system_prompt: str, agent: Optional[str] = None,
+                        history: Optional[list] = None, cache_turns: Optional[int] = None) -> Optional[str]:
         """
         Process a text-only request using the Gemini model
         
         Args:
             user_input: The user's input text
             system_prompt: The system prompt to guide the model
+            agent: Name of the calling agent, used for cache bypass and metrics
+            history: Earlier (role, text) conversation turns from ConversationMemory
+            cache_turns: Latest history turns that are part of the cache key; None for all of them
             
         Returns:
             Optional[str]: The model's response or None if an error occurred
         """
+        history_text = format_history(history)
+        use_cache = agent not in CACHE_BYPASS_AGENTS
+        if use_cache:
+            cache_key = make_cache_key(MODEL_NAME, system_prompt, user_input, language,
+                                       cache_context(history, cache_turns))
+            cached = self.response_cache.get(cache_key, agent)
+            if cached is not None:
+                return cached
+
         try:
-            # Create a ChatGoogleGenerativeAI instance using langchain
-            model = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                google_api_key=self.api_key,
-                temperature=0
-            )
-            
-            prompt_template = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("user", "{user_input}")
-            ])
+            chain = self._build_chain(system_prompt, bool(history))
+            result = chain.invoke(self._chain_inputs(user_input, history))
+            self.token_usage.record(agent, estimate_tokens(system_prompt + history_text + user_input),
+                                    estimate_tokens(result))
 
-            chain = prompt_template | model | StrOutputParser()
-            result = chain.invoke({"user_input": user_input})
+            if use_cache and result:
+                self.response_cache.set(cache_key, result)
             return result
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
             return None
+
+    def stream_request(self, user_input: str, system_prompt: str, agent: Optional[str] = None,
+                       history: Optional[list] = None, cache_turns: Optional[int] = None) -> Iterator[str]:
+        """
+        Process a text-only request and yield the response in chunks as it is generated
+        
+        Args:
+            user_input: The user's input text
+            system_prompt: The system prompt to guide the model
+            agent: Name of the calling agent, used for cache bypass and metrics
+            history: Earlier (role, text) conversation turns from ConversationMemory
+            cache_turns: Latest history turns that are part of the cache key; None for all of them
+            
+        Yields:
+            str: Consecutive pieces of the model's response
+
+        Raises:
+            Exception: If the model call fails, also after some chunks were yielded
+        """
+        history_text = format_history(history)
+        use_cache = agent not in CACHE_BYPASS_AGENTS
+        if use_cache:
+            cache_key = make_cache_key(MODEL_NAME, system_prompt, user_input, language,
+                                       cache_context(history, cache_turns))
+            cached = self.response_cache.get(cache_key, agent)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        try:
+            chain = self._build_chain(system_prompt, bool(history))
+            for chunk in chain.stream(self._chain_inputs(user_input, history)):
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            # Partial text must not pass for a complete answer; the request is reported as failed
+            logger.error(f"Error streaming request: {str(e)}")
+            raise
+
+        self.token_usage.record(agent, estimate_tokens(system_prompt + history_text + user_input),
+                                estimate_tokens("".join(chunks)))
+        if use_cache and chunks:
+            self.response_cache.set(cache_key, "".join(chunks))
+
+    def _build_chain(self, system_prompt: str, with_history: bool = False):
+        """Create the langchain prompt | model | parser chain for a system prompt"""
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        from langchain_core.output_parsers import StrOutputParser
+
+        # Create a ChatGoogleGenerativeAI instance using langchain
+        model = ChatGoogleGenerativeAI(
+            model=MODEL_NAME,
+            google_api_key=self.api_key,
+            temperature=0
+        )
+        
+        messages = [("system", system_prompt)]
+        if with_history:
+            # Passed as message objects so braces in earlier turns are not treated as template variables
+            messages.append(MessagesPlaceholder(variable_name="history"))
+        messages.append(("user", "{user_input}"))
+        prompt_template = ChatPromptTemplate.from_messages(messages)
+
+        return prompt_template | model | StrOutputParser()
+
+    def _chain_inputs(self, user_input: str, history: Optional[list]) -> dict:
+        """Build the chain's input variables, converting history turns to langchain messages"""
+        inputs = {"user_input": user_input}
+        if history:
+            from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+
+            message_types = {USER: HumanMessage, ASSISTANT: AIMessage}
+            inputs["history"] = [
+                message_types[role](content=text) if role in message_types
+                else SystemMessage(content=f"Summary of the earlier conversation: {text}")
+                for role, text in history
+            ]
+        return inputs
     
-    def process_image_request(self, user_input: str, image_path: str, system_prompt: str) -> Optional[str]:
+    def process_image_request(self, user_input: str, image: PreparedImage, system_prompt: str,
+                              use_cache: bool = True) -> Optional[str]:
         """
         Process a request containing both text and an image using the Gemini model
         
         Args:
             user_input: The user's input text
-            image_path: Path to the image file
+            image: The preprocessed image bytes from prepare_image
             system_prompt: The system prompt to guide the model
+            use_cache: Reuse the answer of an identical or near-identical image
             
         Returns:
             Optional[str]: The model's response or None if an error occurred
         """
+        question_key = make_image_question_key(MODEL_NAME, system_prompt, user_input, language)
+        if use_cache:
+            cached = self.image_cache.get(question_key, image.phash)
+            if cached is not None:
+                return cached
+
         try:
             # Create a direct Gemini model instance that can handle multimodal content
-            model = genai.GenerativeModel('gemini-2.0-flash')
+            model = load_genai(self.api_key).GenerativeModel(MODEL_NAME)
             
-            # Encode the image to base64
-            image_data = encode_image_to_base64(image_path)
-            if not image_data:
-                return "Failed to process the image."
-            
-            # Combine system prompt with user input
-            full_prompt = f"{system_prompt}\n\nUser Message: {user_input}"
-            
-            # Create parts for multimodal content
-            parts = [
-                {"text": full_prompt},
-                {
-                    "inline_data": {
-                        "mime_type": f"image/{os.path.splitext(image_path)[1][1:].lower()}",
-                        "data": image_data
-                    }
-                }
-            ]
+            parts = self._build_image_parts(user_input, image, system_prompt)
             
             # Generate content with image and text
             response = model.generate_content(parts, generation_config={"temperature": 0})
+            # Only the text part is counted; image tokens are billed separately by the API
+            self.token_usage.record("image_analysis", estimate_tokens(parts[0]["text"]),
+                                    estimate_tokens(response.text))
+            if use_cache and response.text:
+                self.image_cache.set(question_key, image.phash, response.text)
             
             return response.text
             
@@ -257,41 +361,214 @@ class GeminiChatBot:
             logger.error(f"Error processing image request: {str(e)}")
             return f"Error processing image request: {str(e)}"
 
+    def stream_image_request(self, user_input: str, image: PreparedImage, system_prompt: str,
+                             use_cache: bool = True) -> Iterator[str]:
+        """
+        Process a text and image request and yield the response in chunks as it is generated
+        
+        Args:
+            user_input: The user's input text
+            image: The preprocessed image bytes from prepare_image
+            system_prompt: The system prompt to guide the model
+            use_cache: Reuse the answer of an identical or near-identical image
+            
+        Yields:
+            str: Consecutive pieces of the model's response
 
-class ChatWorker(QThread):
-    """Worker thread to handle AI requests in the background"""
-    
-    finished = pyqtSignal(tuple)
-    error = pyqtSignal(str)
+        Raises:
+            Exception: If the model call fails, also after some chunks were yielded
+        """
+        question_key = make_image_question_key(MODEL_NAME, system_prompt, user_input, language)
+        if use_cache:
+            cached = self.image_cache.get(question_key, image.phash)
+            if cached is not None:
+                # A cached answer is delivered whole
+                yield cached
+                return
 
-    def __init__(self, chat_bot, agent_type, user_input, image_path=None):
-        super().__init__()
-        self.chat_bot = chat_bot
-        self.agent_type = agent_type
-        self.user_input = user_input
+        try:
+            model = load_genai(self.api_key).GenerativeModel(MODEL_NAME)
+            
+            parts = self._build_image_parts(user_input, image, system_prompt)
+            
+            response = model.generate_content(parts, generation_config={"temperature": 0}, stream=True)
+            chunks = []
+            for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+            self.token_usage.record("image_analysis", estimate_tokens(parts[0]["text"]),
+                                    estimate_tokens("".join(chunks)))
+            if use_cache and chunks:
+                self.image_cache.set(question_key, image.phash, "".join(chunks))
+                    
+        except Exception as e:
+            logger.error(f"Error streaming image request: {str(e)}")
+            raise
+
+    def _build_image_parts(self, user_input: str, image: PreparedImage, system_prompt: str) -> list:
+        """Build the multimodal content parts for an image request"""
+        # Combine system prompt with user input
+        full_prompt = f"{system_prompt}\n\nUser Message: {user_input}"
+        
+        # Create parts for multimodal content
+        return [
+            {"text": full_prompt},
+            {
+                "inline_data": {
+                    # Raw bytes are sent as is; no base64 round trip is needed
+                    "mime_type": image.mime_type,
+                    "data": image.data
+                }
+            }
+        ]
+
+    def process_images_request(self, user_input: str, images: List[PreparedImage],
+                               system_prompt: str) -> BatchAnalysis:
+        """
+        Answer a question about several images with per-image and combined answers
+        
+        The batch goes out as one multimodal request when it fits, otherwise each
+        image is analyzed in bounded parallel calls and the answers are combined.
+        
+        Args:
+            user_input: The user's input text
+            images: The preprocessed images, in the order the user added them
+            system_prompt: The system prompt to guide the model
+            
+        Returns:
+            BatchAnalysis: Per-image answers and the combined answer
+        """
+        try:
+            if not fits_single_request(images):
+                client = self.async_client
+                return client.run_sync(analyze_fan_out(client, user_input, images, system_prompt, language))
+
+            model = load_genai(self.api_key).GenerativeModel(MODEL_NAME)
+            parts = build_batch_parts(user_input, images, system_prompt)
+            response = model.generate_content(parts, generation_config={"temperature": 0})
+            self.token_usage.record("image_analysis", estimate_tokens(parts[0]["text"]),
+                                    estimate_tokens(response.text))
+            return split_sections(response.text, len(images))
+            
+        except Exception as e:
+            logger.error(f"Error processing image batch request: {str(e)}")
+            return BatchAnalysis([""] * len(images), f"Error processing image request: {str(e)}")
+
+    def stream_images_request(self, user_input: str, images: List[PreparedImage],
+                              system_prompt: str) -> Iterator[str]:
+        """
+        Answer a question about several images, yielding the response in chunks as it is generated
+        
+        A batch that has to be fanned out is yielded whole once all calls finished.
+        
+        Yields:
+            str: Consecutive pieces of the model's response
+
+        Raises:
+            Exception: If the model call fails, also after some chunks were yielded
+        """
+        if not fits_single_request(images):
+            yield self.process_images_request(user_input, images, system_prompt).to_text()
+            return
+
+        try:
+            model = load_genai(self.api_key).GenerativeModel(MODEL_NAME)
+            parts = build_batch_parts(user_input, images, system_prompt)
+            response = model.generate_content(parts, generation_config={"temperature": 0}, stream=True)
+            chunks = []
+            for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+            self.token_usage.record("image_analysis", estimate_tokens(parts[0]["text"]),
+                                    estimate_tokens("".join(chunks)))
+                    
+        except Exception as e:
+            logger.error(f"Error streaming image batch request: {str(e)}")
+            raise
+
+
+class ImageLoadWorker(QThread):
+    """Worker thread that prepares an image for upload and renders its preview thumbnail"""
+
+    loaded = pyqtSignal(int, int, object, QImage)
+    failed = pyqtSignal(int, int, str)
+
+    def __init__(self, load_id: int, index: int, image_path: str, thumbnail_size: QSize, parent=None):
+        super().__init__(parent)
+        self.load_id = load_id
+        self.index = index
         self.image_path = image_path
+        self.thumbnail_size = thumbnail_size
 
     def run(self):
         try:
-            result = None
-            if self.agent_type == "e_ticaret":
-                result = e_ticaret(self.user_input, self.chat_bot)
-                #item_selector(result, self.chat_bot)
-            elif self.agent_type == "weather_gether":
-                result = weather_gether(self.user_input, self.chat_bot)
-            elif self.agent_type == "friend_chat":
-                result = friend_chat(self.user_input, self.chat_bot)
-            elif self.agent_type == "image_analysis":
-                result = image_analysis(self.user_input, self.image_path, self.chat_bot)
-                
-            self.finished.emit((self.agent_type, result))
+            # Decode once, downscale and re-encode in memory for upload
+            image = prepare_image(self.image_path)
+
+            # QImage (unlike QPixmap) may be used outside the GUI thread
+            thumbnail = QImage.fromData(image.data)
+            if thumbnail.isNull():
+                raise ValueError("Failed to load image")
+            thumbnail = thumbnail.scaled(self.thumbnail_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+            self.loaded.emit(self.load_id, self.index, image, thumbnail)
         except Exception as e:
-            logger.error(f"Error in worker thread: {e}")
-            self.error.emit(str(e))
+            logger.error(f"Error loading image {self.image_path}: {e}")
+            self.failed.emit(self.load_id, self.index, str(e))
+
+
+def collect_stream(chunks: Iterator[str], on_chunk: Callable[[str], None]) -> str:
+    """Forward each streamed chunk to on_chunk and return the joined response"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        on_chunk(chunk)
+    return "".join(parts)
+
+
+def format_products(products: dict, exclude: Optional[str] = None) -> str:
+    """List products with their prices, one entry per product, skipping exclude"""
+    text = ""
+    for prod_id, prod_info in products.items():
+        if prod_id != exclude:
+            text += f"• {prod_info.get('urun_adi', 'Bilinmiyor')}\n"
+            text += f"  Fiyat: {prod_info.get('fiyat', 'N/A')}\n"
+            text += "\n"
+    return text
 
 
-def e_ticaret(user_input: str, chat_bot) -> dict:
-    """Handle e-commerce product search requests"""
+def format_product_answer(products: dict, selected_product_id: Optional[str]) -> str:
+    """Render the answer to a product search, with the selected product highlighted"""
+    if not isinstance(products, dict) or not products:
+        return "Üzgünüm, herhangi bir ürün bulamadım."
+
+    # If a product is selected, highlight it in the display
+    if selected_product_id and selected_product_id in products:
+        selected_product = products[selected_product_id]
+        response_text = "İşte sorunun için önerdiğim en iyi ürün:\n\n"
+        response_text += f"➤ {selected_product.get('urun_adi', 'Bilinmiyor')}\n"
+        response_text += f"  Fiyat: {selected_product.get('fiyat', 'N/A')}\n\n"
+
+        response_text += "Diğer alternatifler:\n"
+        # Don't list the selected product again
+        response_text += format_products(products, exclude=selected_product_id)
+        return response_text
+
+    # If no product is selected, list all products
+    return "İşte bulduğum ürünler:\n\n" + format_products(products)
+
+
+def e_ticaret(user_input: str, chat_bot, speculation=None, memory: Optional[ConversationMemory] = None,
+              on_product: Optional[Callable[[Tuple[str, dict]], None]] = None) -> dict:
+    """
+    Handle e-commerce product search requests
+    
+    A speculatively warmed browser is reused if given. Follow-up questions that resolve
+    to the previous search term are answered from the products cached in memory.
+    on_product receives each (product id, product) as soon as the scraper has read it.
+    """
     system_prompt = f"""
         Sen, kullanıcının tarif ettiği problemi çözecek doğru donanım ürünü öneren bir asistansın.
         
@@ -306,84 +583,90 @@ def e_ticaret(user_input: str, chat_bot) -> dict:
         4. "Donanım hızlandırıcı" gibi belirsiz veya genel terimler kullanma, mutlaka "SSD", "RAM", "işlemci" gibi
            somut donanım parçaları belirt.
         
+        5. Önceki konuşma verilmişse ve kullanıcı önceki ürünlerle ilgili bir takip sorusu soruyorsa
+           ("daha ucuzu?", "hangisi daha iyi?" gibi), önceki arama terimini aynen tekrar et.
+        
         Çıktı sadece aranacak ürün adı olmalıdır, mesela: "SSD", "DDR4 RAM", "Intel işlemci" gibi.
         Çıktı şu dilde olmalıdır: {language}
     """
-    response = chat_bot.process_request(user_input, system_prompt)
+    history = memory.history() if memory else None
+    # Follow-ups ("daha ucuzu?") resolve against the last exchange, so only that is part of the cache key
+    response = chat_bot.process_request(user_input, system_prompt, agent="e_ticaret", history=history,
+                                        cache_turns=CACHE_CONTEXT_TURNS)
     if not response:
+        if speculation:
+            speculation.cancel()
         raise ValueError("No response from chat bot")
     
-    logger.info(f"Product search term: {response}")
-    urun_list = hepsiburada_urunleri_incele(response)    
-    return urun_list
-
-
-def item_selector(product_list: dict, chat_bot, user_input: str) -> str:
-    """Select the best product from the search results and open it with WebDriver"""
-    # Ürün listesinden URL'leri kaldırıp temiz bir JSON hazırla
-    clean_product_list = {}
-    for prod_id, prod_info in product_list.items():
-        clean_product_list[prod_id] = {
-            "urun_adi": prod_info.get("urun_adi", ""),
-            "fiyat": prod_info.get("fiyat", ""),
-            "marka": prod_info.get("marka", "")
-        }
+    search_term = response.strip()
+    logger.info(f"Product search term: {search_term}")
+    
+    # Same search as last time: re-rank the cached products instead of scraping again
+    cached_products = memory.last_results("e_ticaret", normalize_term(search_term)) if memory else None
+    if cached_products:
+        logger.info(f"Reusing {len(cached_products)} cached products for '{search_term}'")
+        if speculation:
+            speculation.cancel()
+        return cached_products
+    
+    driver, open_search = None, None
+    if speculation:
+        driver, open_search = speculation.commit(search_term)
+        logger.info(f"Speculative browser {'reused' if driver else 'unavailable'}, "
+                    f"search page {'already open' if open_search else 'not preloaded'} "
+                    f"(hit rate: {speculation.executor.hit_rate():.0%})")
     
-        system_prompt = f"""
-        You are an expert assistant responsible for selecting the most reasonable and well-balanced product from a list, based on a deep analysis of product details.
+    # Selenium and NumPy are only loaded for shopping requests
+    from hepsiburada_data_gether import hepsiburada_urunleri_incele
+    from product_dedup import collapse_duplicates
+
+    urun_bulundu = (lambda prod_id, product: on_product((prod_id, product))) if on_product else None
+    urun_list = hepsiburada_urunleri_incele(search_term, driver=driver, acik_arama=open_search,
+                                            urun_bulundu=urun_bulundu)
+    # The same product from several sellers or in colour variants is listed once, cheapest offer first
+    urun_list, _ = collapse_duplicates(urun_list)
+    if memory and urun_list:
+        memory.set_last_results("e_ticaret", normalize_term(search_term), urun_list)
+    return urun_list
 
-        YOUR TASK:
-        - Carefully examine and compare all product specifications, features, brand reputation, and price.
-        - Select ONLY ONE product that offers the best combination of **quality**, **performance**, and **value** — not just the cheapest, but the smartest choice overall.
 
-        DECISION CRITERIA:
-        1. Think deeply and critically about each product's specifications, benefits, and trade-offs.
-        2. Compare the products across all relevant factors before making your final decision.
-        3. Prioritize **reliable brands**, **modern technologies**, and **practical features** that offer long-term value.
+ITEM_SELECTOR_PROMPT = """
+        You select the single most reasonable product for the user from a candidate table.
 
         USER'S REQUEST: "{user_input}"
 
+        TABLE FORMAT: one product per row as "#|ad|fiyat(TL)|m": row number, product title,
+        price in Turkish lira and a brand code. Brand codes are listed on the "m:" line.
 
-        PRODUCT-SPECIFIC GUIDELINES:
-
-        For SSDs:
-        - Higher capacities (preferably 500GB or more) offer better long-term utility.
-        - NVMe/M.2 drives are significantly faster and more efficient than SATA.
-        - Reliable brands include Samsung, Kingston, Crucial, WD, and Corsair.
-
-        For RAM:
-        - Higher capacity (e.g., 16GB or 32GB) is better for multitasking and future-proofing.
-        - Newer generation standards like DDR4 or DDR5 are preferable.
-        - Higher MHz speed means better performance.
-        - Dual-channel support is an advantage.
-
-        For CPUs:
-        - Prefer newer generations (e.g., Intel 11th/12th/13th gen or AMD Ryzen 5000/7000 series).
-        - More cores and threads usually mean better multitasking and performance.
-        - Higher base and boost clock speeds are important for responsiveness.
-        - Integrated graphics can be an extra advantage depending on use case.
-
-        EVALUATION PRINCIPLES:
-        - Do not simply choose the lowest price — instead, choose the product that makes the most sense overall considering its features, performance, and long-term value.
-        - Avoid overpriced products with weak specs, and avoid unreliable or unknown brands even if they are cheaper.
-        - Choose the product that stands out as the most reasonable and well-rounded option after thorough analysis.
+        DECISION CRITERIA:
+        - Best overall balance of quality, performance and long-term value, not simply the lowest price.
+        - Prefer reliable brands and modern technologies; avoid unknown brands and overpriced weak specs.
+        - SSD: 500GB or more, NVMe/M.2 over SATA; reliable brands are Samsung, Kingston, Crucial, WD, Corsair.
+        - RAM: 16GB or more, DDR4/DDR5, higher MHz, dual-channel kits.
+        - CPU: newer generations (Intel 11th-13th gen, Ryzen 5000/7000), more cores/threads, higher clocks,
+          integrated graphics as a bonus.
 
         RESPONSE FORMAT:
-        Return ONLY the ID of the selected product (e.g., "product_3"). Do not provide any explanation—just the ID.
-
-        Your response must be in this language: {language}
+        Return ONLY the row number of the selected product (e.g., "3"). No explanation.
+        The user's language is {language}.
         """
 
-    
-    response = chat_bot.process_request(str(clean_product_list), system_prompt)
-    
-    if not response:
-        logger.error("No response from product selector")
+
+def item_selector(product_list: dict, chat_bot, user_input: str, open_product: bool = True) -> str:
+    """Select the best product from the search results and open it with WebDriver unless open_product is False"""
+    # Rank locally from the product specs; the model is only consulted for ties or unknown categories
+    product_id, tied_ids = rank_products(product_list, user_input)
+    if product_id is None and tied_ids:
+        candidates = {prod_id: product_list[prod_id] for prod_id in tied_ids}
+        product_id = llm_item_selector(candidates, chat_bot, user_input)
+        if product_id not in candidates:
+            # Ties are ordered by local score (search result order when the category is unknown)
+            product_id = tied_ids[0]
+            logger.warning(f"Tie-break selection failed, falling back to the best local match {product_id}")
+
+    if not product_id:
         return None
     
-    # Strip any extra text, get just the product ID
-    product_id = response.strip()
-    
     # If the product exists in our original list, open its URL with WebDriver
     if product_id in product_list:
         selected_product = product_list[product_id]
@@ -396,11 +679,13 @@ def item_selector(product_list: dict, chat_bot, user_input: str) -> str:
         print(f"URL: {product_url}\n")
         
         # URL'yi WebDriver ile aç
-        try:
-            open_url_with_webdriver(product_url)
-            logger.info(f"Ürün URL'si WebDriver ile açıldı: {product_url}")
-        except Exception as e:
-            logger.error(f"Ürün URL'si açılırken hata: {e}")
+        if open_product:
+            try:
+                from hepsiburada_buy import open_url_with_webdriver
+                open_url_with_webdriver(product_url)
+                logger.info(f"Ürün URL'si WebDriver ile açıldı: {product_url}")
+            except Exception as e:
+                logger.error(f"Ürün URL'si açılırken hata: {e}")
         
         logger.info(f"Selected product: {product_id}")
         return product_id
@@ -409,21 +694,64 @@ def item_selector(product_list: dict, chat_bot, user_input: str) -> str:
         return None
 
 
-def weather_gether(user_input: str, chat_bot) -> str:
-    """Get weather information for a requested location"""
-    _, weather_api = load_env_variables()
+def llm_item_selector(product_list: dict, chat_bot, user_input: str,
+                      budget: int = PRODUCT_PROMPT_TOKEN_BUDGET) -> Optional[str]:
+    """
+    Ask the model to pick one product id from the candidates
+    
+    Candidates are sent as a compact table. If they do not fit in the token budget
+    they are split into chunks that are ranked by parallel model calls, followed by
+    a final round over the chunk winners (see product_selection).
+    """
+    # Built once per selection, not per product
+    system_prompt = ITEM_SELECTOR_PROMPT.format(user_input=user_input, language=language)
+    
+    chunks = chunk_products(product_list, system_prompt, budget)
+    if len(chunks) > 1:
+        logger.info(f"{len(product_list)} candidates exceed the token budget, selecting in {len(chunks)} chunks")
+        client = chat_bot.async_client
+        try:
+            return client.run_sync(
+                select_map_reduce(client, product_list, system_prompt, language, budget),
+                timeout=SELECTION_DEADLINE + 5
+            )
+        except GeminiRequestError as e:
+            logger.error(f"Map-reduce product selection failed: {e}")
+            return None
+    
+    return _select_from_table(product_list, chat_bot, system_prompt)
+
+
+def _select_from_table(product_list: dict, chat_bot, system_prompt: str) -> Optional[str]:
+    """Send one compact candidate table to the model and decode the chosen product id"""
+    table, row_to_id = encode_products(product_list)
+    response = chat_bot.process_request(table, system_prompt, agent="item_selector")
+    
+    if not response:
+        logger.error("No response from product selector")
+        return None
+    
+    product_id = decode_selection(response, row_to_id)
+    if product_id is None:
+        logger.error(f"Selected product {response.strip()} not found in candidates")
+    return product_id
+
 
+def extract_cities_with_model(user_input: str, chat_bot,
+                              memory: Optional[ConversationMemory] = None) -> Tuple[List[str], Optional[str]]:
+    """Ask the model for the cities of a weather request; returns (cities, error message)"""
     system_weather_prompt = f"""
-    You are an advanced language model that extracts a single city name from the given text to be used for weather forecasts. Follow these instructions carefully:
+    You are an advanced language model that extracts city names from the given text to be used for weather forecasts. Follow these instructions carefully:
 
-    1. Extract exactly one city name from the text.
-    2. If multiple city names are mentioned, return only the first one.
+    1. Extract every city name from the text, in the order they are mentioned.
+    2. Put each city in its own <city> element.
     3. If no city name is detected, return an error message in XML format.
     4. The output must be in well-formed XML format, following this structure:
 
     Valid Output Example:
     <weather_request>
         <city>CityName</city>
+        <city>OtherCityName</city>
     </weather_request>
 
     Error Output Example:
@@ -431,7 +759,9 @@ def weather_gether(user_input: str, chat_bot) -> str:
         <error>No city name detected in the input text.</error>
     </weather_request>
     """
-    response = chat_bot.process_request(user_input, system_weather_prompt)
+    history = memory.history() if memory else None
+    response = chat_bot.process_request(user_input, system_weather_prompt, agent="weather_gether", history=history,
+                                        cache_turns=CACHE_CONTEXT_TURNS)
 
     if not response:
         raise ValueError("No response from chat bot")
@@ -443,44 +773,43 @@ def weather_gether(user_input: str, chat_bot) -> str:
         cleaned_data = cleaned_data.strip()
         
         root = ET.fromstring(cleaned_data)
-        city_element = root.find('city')
+        cities = [element.text.strip() for element in root.findall('city') if element.text]
         
-        if city_element is None:
+        if not cities:
             error_element = root.find('error')
             if error_element is not None:
-                return f"Error: {error_element.text}"
-            return "Error: Could not detect city name."
+                return [], f"Error: {error_element.text}"
+            return [], "Error: Could not detect city name."
             
-        location = city_element.text
+        return cities, None
     except Exception as e:
         logger.error(f"XML parsing error: {e}")
-        return f"Error parsing city information: {e}"
+        return [], f"Error parsing city information: {e}"
 
-    url = "https://api.weatherapi.com/v1/forecast.xml"
-    days = 1
 
-    try:
-        response = requests.get(
-            url,
-            params={"key": weather_api, "q": location, "days": days},
-            timeout=10
-        )
-        response.raise_for_status()
-
-        root = ET.fromstring(response.content)
-        location_name = root.find("location/name").text
-        current_temp = root.find("current/temp_c").text
-        current_weather = root.find("current/condition/text").text
-
-        return f"Location: {location_name}, Temperature: {current_temp}°C, Weather: {current_weather}"
+def weather_gether(user_input: str, chat_bot, memory: Optional[ConversationMemory] = None) -> str:
+    """Get weather information for the requested locations and forecast horizon"""
+    # The bundled gazetteer finds most cities without a model round trip
+    locations = find_cities(user_input)
+    if not locations:
+        locations, error = extract_cities_with_model(user_input, chat_bot, memory)
+        if error:
+            return error
+    else:
+        logger.info(f"Cities found in gazetteer: {locations}")
+    locations = locations[:MAX_CITIES]
+    days = forecast_horizon(user_input)
 
-    except Exception as e:
-        logger.error(f"Weather API error: {e}")
-        raise
+    results = fetch_forecasts(chat_bot.weather_client, locations, days, lang=VOICE_LANG_MAP.get(language, "en"))
+    if all(data is None for _, data, _ in results):
+        # Nothing to compare; surface the upstream error like a single lookup would
+        raise ValueError(results[0][2])
+    return format_comparison(results, days)
 
 
-def friend_chat(user_input: str, chat_bot) -> str:
-    """Handle casual conversation"""
+def friend_chat(user_input: str, chat_bot, on_chunk: Optional[Callable[[str], None]] = None,
+                memory: Optional[ConversationMemory] = None) -> str:
+    """Handle casual conversation, passing response chunks to on_chunk as they arrive if given"""
     system_prompt = f"""
     You are an experienced AI assistant. Your role is to help users solve their problems using only existing resources, free methods, and tools they already have access to.
 
@@ -489,14 +818,21 @@ def friend_chat(user_input: str, chat_bot) -> str:
     Your responses must always be in **{language}**, and they should be clear, concise, and step-by-step when necessary. You may suggest open-source software, free online tools, built-in system features, or manual methods that can help solve the issue.
     """
 
-    response = chat_bot.process_request(user_input, system_prompt)
+    history = memory.history() if memory else None
+    if on_chunk:
+        response = collect_stream(
+            chat_bot.stream_request(user_input, system_prompt, agent="friend_chat", history=history), on_chunk
+        )
+    else:
+        response = chat_bot.process_request(user_input, system_prompt, agent="friend_chat", history=history)
     if not response:
         raise ValueError("No response from chat bot")
     return response
 
 
-def image_analysis(user_input: str, image_path: str, chat_bot) -> str:
-    """Analyze the uploaded image and respond to the user's query"""
+def image_analysis(user_input: str, images: List[PreparedImage], chat_bot,
+                   on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """Analyze the uploaded images and respond to the user's query, streaming to on_chunk if given"""
     system_prompt = f"""
     You are an advanced visual analysis assistant. You have been given an image to analyze along with a user query.
     
@@ -516,13 +852,23 @@ def image_analysis(user_input: str, image_path: str, chat_bot) -> str:
     Your response must be in the language: {language}
     """
     
-    response = chat_bot.process_image_request(user_input, image_path, system_prompt)
+    if len(images) > 1:
+        # Several images are answered together, with a section per image and a summary
+        if on_chunk:
+            response = collect_stream(chat_bot.stream_images_request(user_input, images, system_prompt), on_chunk)
+        else:
+            response = chat_bot.process_images_request(user_input, images, system_prompt).to_text()
+    elif on_chunk:
+        response = collect_stream(chat_bot.stream_image_request(user_input, images[0], system_prompt), on_chunk)
+    else:
+        response = chat_bot.process_image_request(user_input, images[0], system_prompt)
     if not response:
         raise ValueError("No response from chat bot for image analysis")
     return response
 
 
-def agent_selector(chat_bot, user_input: str, has_image: bool = False) -> str:
+def agent_selector(chat_bot, user_input: str, has_image: bool = False,
+                   memory: Optional[ConversationMemory] = None) -> str:
     """Select the appropriate agent based on the user's request"""
     if has_image:
         return "image_analysis"  # If image is present, always use image analysis agent
@@ -533,22 +879,76 @@ def agent_selector(chat_bot, user_input: str, has_image: bool = False) -> str:
     If the request is about buying or finding a product, select the 'e_ticaret' agent.
     If the request is about getting weather information, select the 'weather_gether' agent.
     If the request is about casual, friendly conversation, select the 'friend_chat' agent.
+    Follow-up questions (e.g. "cheaper one?") go to the agent that handled the earlier conversation turns.
     """
 
-    response = chat_bot.process_request(user_input, system_prompt)
+    history = memory.history() if memory else None
+    response = chat_bot.process_request(user_input, system_prompt, agent="agent_selector", history=history,
+                                        cache_turns=CACHE_CONTEXT_TURNS)
     if not response:
         raise ValueError("No response from agent selector")
     return response.strip()
 
 
+def run_agent(chat_bot, agent_type: str, user_input: str, images: Optional[List[PreparedImage]] = None,
+              speculation=None, memory: Optional[ConversationMemory] = None,
+              on_chunk: Optional[Callable[[str], None]] = None,
+              on_progress: Optional[Callable[[object], None]] = None, open_product: bool = True):
+    """
+    Run the agent picked for a request; called on a scheduler or server thread
+
+    Returns the agent's answer. For e_ticaret that is (products, selected product id),
+    since the product is selected (and, if open_product, opened in the browser) as part
+    of the request; scraped products are published through on_progress while the search runs.
+    """
+    if agent_type == "e_ticaret":
+        products = e_ticaret(user_input, chat_bot, speculation, memory, on_product=on_progress)
+        selected_id = item_selector(products, chat_bot, user_input, open_product) if products else None
+        return products, selected_id
+    if speculation:
+        speculation.cancel()
+    if agent_type == "weather_gether":
+        return weather_gether(user_input, chat_bot, memory)
+    if agent_type == "friend_chat":
+        return friend_chat(user_input, chat_bot, on_chunk=on_chunk, memory=memory)
+    if agent_type == "image_analysis":
+        return image_analysis(user_input, images or [], chat_bot, on_chunk=on_chunk)
+    return None
+
+
+class PendingRequest:
+    """Chat display state of a request that has not been answered yet"""
+
+    def __init__(self, user_input: str, message_id: int, speculation=None):
+        self.user_input = user_input
+        self.message_id = message_id  # Chat history item showing the request's answer
+        self.speculation = speculation  # Browser warm-up started for the request, if any
+        self.stream_buffer = []  # Streamed chunks waiting for the next display flush
+        self.streamed = False  # True once streamed text replaced the loading message
+        self.products = {}  # Products scraped so far, shown while the search is running
+
+
 class ChatBotGUI(QWidget):
     """Main GUI class for the chatbot application"""
     
-    def __init__(self):
+    def __init__(self, chat_bot: Optional[GeminiChatBot] = None):
         super().__init__()
         self.current_language = "English"
         self.voice_active = False  # Default voice state
-        self.current_image_path = None  # Track the currently loaded image
+        self.audio = AudioService(clip_cache=ClipCache())  # Speaks answers on its own thread
+        self.current_images = []  # Preprocessed bytes of the currently loaded images
+        self.image_slots = []  # (image, thumbnail) per selected file while a batch is loading
+        self.image_loading = False  # True while the selected images are being prepared
+        self.image_load_id = 0  # Incremented per batch so stale results are ignored
+        self.thumbnail_cache = OrderedDict()  # (path, mtime, thumbnail size) -> (prepared image, thumbnail)
+        self.speculative = SpeculativeExecutor()  # Warms a browser while routing is in flight
+        self.pending_requests = {}  # Request id -> PendingRequest, until answered
+        self.scheduler = RequestScheduler(parent=self)  # Runs requests concurrently, per-agent limits
+        self.scheduler.routed.connect(self.handle_routed)
+        self.scheduler.chunk.connect(self.handle_chunk)
+        self.scheduler.progress.connect(self.handle_product)
+        self.scheduler.finished.connect(self.handle_response)
+        self.scheduler.failed.connect(self.handle_error)
         self.setWindowTitle('Tetra AI')
         self.setFixedSize(600, 1000)
 
@@ -556,11 +956,27 @@ class ChatBotGUI(QWidget):
         language = "English"  # Default language
 
         self.init_ui()
-        try:
-            self.chat_bot = GeminiChatBot()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to initialize chat bot: {e}")
-            sys.exit(1)
+        # Initialization errors (e.g. missing API keys) propagate to the caller instead of exiting here
+        self.chat_bot = chat_bot if chat_bot is not None else GeminiChatBot()
+        self.memory = ConversationMemory(self.chat_bot)
+        QTimer.singleShot(0, self.prewarm)  # Runs once the event loop has shown the window
+
+    def prewarm(self):
+        """Load heavy libraries and fixed voice clips in the background after startup"""
+        if not PREWARM_ENABLED:
+            return
+        api_key = self.chat_bot.api_key
+
+        def warm():
+            prewarm_modules()
+            try:
+                load_genai(api_key)
+            except Exception as e:
+                logger.warning(f"Could not configure Gemini in the background: {e}")
+            self.audio.prewarm((phrase, lang) for phrase in VOICE_PHRASES.values()
+                               for lang in VOICE_LANG_MAP.values())
+
+        threading.Thread(target=warm, name="prewarm", daemon=True).start()
 
     def init_ui(self):
         """Initialize the user interface"""
@@ -628,12 +1044,14 @@ class ChatBotGUI(QWidget):
     def toggle_voice(self, state):
         """Toggle voice mode on/off"""
         self.voice_active = (state == "ON")
+        if not self.voice_active:
+            self.audio.stop()
         logger.info(f"Voice mode: {self.voice_active}")
 
     def setup_image(self, layout):
         """Set up the image display area"""
         # Load the photo
-        pixmap = QPixmap(os.path.join(ICON_PATH, "/run/media/berkkucukk/Depo/WebDriver/tetra.png"))
+        pixmap = QPixmap(ICON_FILE)
 
         if not pixmap.isNull():
             # Daha küçük boyut kullanın, örneğin 300x240
@@ -684,11 +1102,17 @@ class ChatBotGUI(QWidget):
             
     def setup_chat_display(self, layout):
         """Set up the chat display area"""
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
+        # One item per message; older messages are kept in the session log instead of memory
+        self.chat_history = ChatHistoryModel(SessionLog(), parent=self)
+        self.chat_display = ChatHistoryView(self.chat_history)
         self.chat_display.setMinimumHeight(200)
         self.chat_display.setFont(QFont("Courier New", 11))
         layout.addWidget(self.chat_display)
+
+        # Streamed chunks are batched and written once per frame to avoid repaint storms
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setInterval(STREAM_FLUSH_INTERVAL_MS)
+        self.stream_timer.timeout.connect(self.flush_stream_buffer)
         
     def setup_image_preview(self, layout):
         """Set up the image preview area (initially hidden)"""
@@ -798,192 +1222,299 @@ class ChatBotGUI(QWidget):
         self.image_button.setText(IMAGE_BUTTON_TEXTS.get(new_language, "Upload Image"))
 
     def open_image_dialog(self):
-        """Open a file dialog to select an image"""
+        """Open a file dialog to select one or more images"""
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, 
-            "Select Image", 
+            "Select Images", 
             "", 
             "Image Files (*.png *.jpg *.jpeg *.bmp *.gif);;All Files (*)",
             options=options
         )
         
-        if file_path:
-            self.load_image(file_path)
+        if len(file_paths) > MAX_BATCH_IMAGES:
+            QMessageBox.warning(self, "Image Error",
+                                f"At most {MAX_BATCH_IMAGES} images can be sent at once; "
+                                f"only the first {MAX_BATCH_IMAGES} were loaded.")
+            file_paths = file_paths[:MAX_BATCH_IMAGES]
+        if file_paths:
+            self.load_images(file_paths)
     
-    def load_image(self, image_path):
-        """Load and display the selected image"""
-        try:
-            # Create a temporary copy of the image
-            temp_path = save_temp_image(image_path)
-            if not temp_path:
-                raise ValueError("Failed to save temporary image")
-            
-            # Load and display the image preview
-            pixmap = QPixmap(temp_path)
-            if pixmap.isNull():
-                raise ValueError("Failed to load image")
-            
-            # Scale the image to fit the preview area while maintaining aspect ratio
-            preview_width = self.image_preview_label.width()
-            preview_height = self.image_preview_label.height()
-            scaled_pixmap = pixmap.scaled(
-                preview_width, 
-                preview_height, 
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
+    def load_images(self, image_paths):
+        """Prepare the selected images in parallel background workers and preview them when ready"""
+        self.image_load_id += 1
+        self.current_images = []
+        self.image_slots = [None] * len(image_paths)
+
+        # Each thumbnail gets an equal share of the preview width
+        spacing = THUMBNAIL_SPACING * (len(image_paths) - 1)
+        thumbnail_size = QSize((self.image_preview_label.width() - spacing) // len(image_paths),
+                               self.image_preview_label.height())
+
+        for index, image_path in enumerate(image_paths):
+            try:
+                # Thumbnails shrink as more images share the preview, so the size is part of the key
+                cache_key = (image_path, os.path.getmtime(image_path),
+                             thumbnail_size.width(), thumbnail_size.height())
+            except OSError as e:
+                self.image_load_failed(self.image_load_id, index, str(e))
+                continue
+
+            cached = self.thumbnail_cache.get(cache_key)
+            if cached is not None:
+                self.thumbnail_cache.move_to_end(cache_key)
+                self.image_slots[index] = cached
+                continue
+
+            # Parented to the window so a superseded load can keep running until it finishes
+            loader = ImageLoadWorker(self.image_load_id, index, image_path, thumbnail_size, parent=self)
+            loader.loaded.connect(
+                lambda load_id, index, image, thumbnail, cache_key=cache_key:
+                    self.image_loaded(load_id, index, cache_key, image, thumbnail)
             )
-            
-            self.image_preview_label.setPixmap(scaled_pixmap)
-            self.image_preview_container.setVisible(True)
-            
-            # Store the path to the temporary image
-            self.current_image_path = temp_path
-            
-            logger.info(f"Image loaded: {image_path}")
-            
-        except Exception as e:
-            logger.error(f"Error loading image: {e}")
-            QMessageBox.warning(self, "Image Error", f"Failed to load image: {e}")
-            self.current_image_path = None
-    
+            loader.failed.connect(self.image_load_failed)
+            loader.finished.connect(loader.deleteLater)
+            loader.start()
+            logger.info(f"Loading image: {image_path}")
+
+        self.image_loading = True
+        self.image_preview_label.setPixmap(QPixmap())
+        self.image_preview_label.setText("Loading image...")
+        self.image_preview_container.setVisible(True)
+        self.show_images(self.image_load_id)
+
+    def image_loaded(self, load_id, index, cache_key, image, thumbnail):
+        """Cache a finished image load and fill its slot if the batch is still the current one"""
+        self.thumbnail_cache[cache_key] = (image, thumbnail)
+        while len(self.thumbnail_cache) > THUMBNAIL_CACHE_SIZE:
+            self.thumbnail_cache.popitem(last=False)
+        if load_id == self.image_load_id:
+            self.image_slots[index] = (image, thumbnail)
+            self.show_images(load_id)
+
+    def image_load_failed(self, load_id, index, error_message):
+        """Drop an image that could not be loaded from the batch and report it"""
+        if load_id != self.image_load_id:
+            return
+        self.image_slots[index] = False
+        QMessageBox.warning(self, "Image Error", f"Failed to load image: {error_message}")
+        self.show_images(load_id)
+
+    def show_images(self, load_id):
+        """Display the batch's thumbnails side by side once every image has been prepared"""
+        if load_id != self.image_load_id or None in self.image_slots:
+            return  # Superseded, or images are still loading
+
+        self.image_loading = False
+        loaded = [slot for slot in self.image_slots if slot]
+        self.image_slots = []
+        if not loaded:
+            self.remove_image()
+            return
+
+        thumbnails = [thumbnail for _, thumbnail in loaded]
+        width = sum(thumbnail.width() for thumbnail in thumbnails) + THUMBNAIL_SPACING * (len(thumbnails) - 1)
+        height = max(thumbnail.height() for thumbnail in thumbnails)
+        preview = QPixmap(width, height)
+        preview.fill(Qt.transparent)
+        painter = QPainter(preview)
+        x = 0
+        for thumbnail in thumbnails:
+            painter.drawImage(x, (height - thumbnail.height()) // 2, thumbnail)
+            x += thumbnail.width() + THUMBNAIL_SPACING
+        painter.end()
+
+        self.image_preview_label.setPixmap(preview)
+        self.image_preview_container.setVisible(True)
+        self.current_images = [image for image, _ in loaded]
+        logger.info(f"{len(self.current_images)} image(s) loaded")
+
     def remove_image(self):
-        """Remove the currently loaded image"""
+        """Remove the currently loaded images"""
+        self.image_load_id += 1  # Discard loads that are still in progress
+        self.image_loading = False
+        self.image_slots = []
         self.image_preview_label.clear()
         self.image_preview_container.setVisible(False)
-        
-        # Delete the temporary file if it exists
-        if self.current_image_path and os.path.exists(self.current_image_path):
-            try:
-                os.remove(self.current_image_path)
-            except Exception as e:
-                logger.error(f"Error removing temporary image file: {e}")
-        
-        self.current_image_path = None
+        self.current_images = []
         logger.info("Image removed")
 
     def handle_request(self):
-        """Process the user's request when send button is clicked"""
+        """Submit the user's request; the answer appears in place once it is ready"""
         user_input = self.entry.text().strip()
-        has_image = self.current_image_path is not None
+        images = list(self.current_images)
+        has_image = bool(images)
+
+        if self.image_loading:
+            self.chat_history.append("[Info] Please wait until the image has finished loading.", SYSTEM)
+            return
         
         if not user_input and not has_image:
-            self.chat_display.append("[Error] Please enter a message or upload an image.")
+            self.chat_history.append("[Error] Please enter a message or upload an image.", SYSTEM)
             return
 
-        self.send_button.setEnabled(False)
         self.entry.clear()
+        self.audio.stop()  # Don't keep reading out the previous answer
         
         # Add user message to chat display
-        self.chat_display.append(f"You: {user_input}")
+        user_message = f"You: {user_input}"
+        if len(images) > 1:
+            user_message += f"\n[{len(images)} images uploaded]"
+        elif has_image:
+            user_message += "\n[Image uploaded]"
+        self.chat_history.append(user_message, USER)
         if has_image:
-            self.chat_display.append("[Image uploaded]")
-        self.chat_display.append("")  # Extra line for spacing
+            self.remove_image()  # The images belong to this request; the next one starts empty
 
-        try:
-            # Determine which agent to use based on user input and presence of image
-            agent_type = agent_selector(self.chat_bot, user_input, has_image)
-            
-            # Show appropriate loading message immediately based on agent type
-            if agent_type == "e_ticaret":
-                self.chat_display.append("Tetra AI: Searching Hepsiburada...\n")
-            elif agent_type == "weather_gether":
-                self.chat_display.append("Tetra AI: Fetching weather information...\n")
-            elif agent_type == "image_analysis":
-                self.chat_display.append("Tetra AI: Analyzing your image...\n")
-            else:
-                self.chat_display.append("Tetra AI: Processing your request...\n")
-            
-            # Create worker thread with image path if available
-            self.worker = ChatWorker(self.chat_bot, agent_type, user_input, self.current_image_path)
-            self.worker.finished.connect(self.handle_response)
-            self.worker.error.connect(self.handle_error)
-            self.worker.start()
+        message_id = self.chat_history.append("Tetra AI: Processing your request...", ASSISTANT)
 
-        except Exception as e:
-            self.handle_error(str(e))
+        # Start the browser now so it overlaps with routing and search term extraction
+        speculation = None if has_image else self.speculative.start(user_input)
+        chat_bot, memory = self.chat_bot, self.memory
 
-    def handle_response(self, result):
-        """Handle the response from the AI"""
+        def route() -> str:
+            # Determine which agent to use based on user input and presence of image
+            try:
+                return agent_selector(chat_bot, user_input, has_image, memory)
+            except Exception:
+                if speculation:
+                    speculation.cancel()
+                raise
+
+        def run(agent_type: str, on_chunk: Callable[[str], None], on_progress: Callable[[object], None]):
+            stream = STREAMING_ENABLED and agent_type in STREAMING_AGENTS
+            return run_agent(chat_bot, agent_type, user_input, images, speculation, memory,
+                             on_chunk if stream else None, on_progress)
+
+        request_id = self.scheduler.submit(route, run)
+        # Signals are delivered on this thread, so none can arrive before this entry exists
+        self.pending_requests[request_id] = PendingRequest(user_input, message_id, speculation)
+
+    def replace_message(self, request: PendingRequest, text: str, append: bool = False):
+        """Replace (or extend) a pending request's answer in the chat display"""
+        self.chat_history.update(request.message_id, text, append=append)
+
+    def handle_routed(self, request_id, agent_type):
+        """Show the agent-specific loading message of a routed request"""
+        request = self.pending_requests.get(request_id)
+        if request is not None and not request.streamed:
+            loading_text = AGENT_LOADING_MESSAGES.get(agent_type, "Processing your request...")
+            self.replace_message(request, f"Tetra AI: {loading_text}")
+
+    def handle_product(self, request_id, item):
+        """Add a product to a running search's answer as soon as it has been scraped"""
+        request = self.pending_requests.get(request_id)
+        if request is None:
+            return
+        prod_id, product = item
+        request.products[prod_id] = product
+        self.replace_message(request, f"Tetra AI: Searching Hepsiburada... ({len(request.products)} found)\n\n"
+                                      + format_products(request.products).rstrip())
+
+    def handle_chunk(self, request_id, chunk):
+        """Queue a streamed response chunk for display"""
+        request = self.pending_requests.get(request_id)
+        if request is None:
+            return
+        request.stream_buffer.append(chunk)
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+
+    def flush_stream_buffer(self):
+        """Write the queued stream chunks of every request to the chat display"""
+        flushed = False
+        for request in self.pending_requests.values():
+            if not request.stream_buffer:
+                continue
+            text = "".join(request.stream_buffer)
+            request.stream_buffer.clear()
+            if request.streamed:
+                self.replace_message(request, text, append=True)
+            else:
+                request.streamed = True
+                self.replace_message(request, f"Tetra AI: {text}")
+            flushed = True
+        if not flushed:
+            self.stream_timer.stop()
+
+    def finish_request(self, request_id) -> Optional[PendingRequest]:
+        """Flush any remaining streamed text of a request and stop tracking it"""
+        request = self.pending_requests.get(request_id)
+        if request is not None:
+            self.flush_stream_buffer()
+            del self.pending_requests[request_id]
+        return request
+
+    def handle_response(self, request_id, result):
+        """Show a request's answer in place of its loading message"""
+        request = self.finish_request(request_id)
+        if request is None:
+            return
         agent_type, response = result
         
         if agent_type == "e_ticaret":
-            # Don't display "Searching Hepsiburada..." again since it's already shown
-            if isinstance(response, dict) and response:
-                # Get original user input (this is passed to the ChatWorker)
-                original_user_input = self.worker.user_input
-                
-                # Select the most appropriate product based on user's request
-                selected_product_id = item_selector(response, self.chat_bot, original_user_input)
-                
-                # If a product is selected, highlight it in the display
-                if selected_product_id and selected_product_id in response:
-                    selected_product = response[selected_product_id]
-                    response_text = "İşte sorunun için önerdiğim en iyi ürün:\n\n"
-                    response_text += f"➤ {selected_product.get('urun_adi', 'Bilinmiyor')}\n"
-                    response_text += f"  Fiyat: {selected_product.get('fiyat', 'N/A')}\n\n"
-                    
-                    response_text += "Diğer alternatifler:\n"
-                    for prod_id, prod_info in response.items():
-                        if prod_id != selected_product_id:  # Don't list the selected product again
-                            response_text += f"• {prod_info.get('urun_adi', 'Bilinmiyor')}\n"
-                            response_text += f"  Fiyat: {prod_info.get('fiyat', 'N/A')}\n"
-                            response_text += "\n"
-                else:
-                    # If no product is selected, list all products
-                    response_text = "İşte bulduğum ürünler:\n\n"
-                    for prod_id, prod_info in response.items():
-                        response_text += f"• {prod_info.get('urun_adi', 'Bilinmiyor')}\n"
-                        response_text += f"  Fiyat: {prod_info.get('fiyat', 'N/A')}\n"
-                        response_text += "\n"
-            else:
-                response_text = "Üzgünüm, herhangi bir ürün bulamadım."
-                
-            self.chat_display.append(f"Tetra AI: {response_text}\n")
-            voice_text = "İhtiyacınıza uygun ürünleri buldum. Detaylar sohbet penceresinde."
+            products, selected_product_id = response
+            response_text = format_product_answer(products, selected_product_id)
+            self.replace_message(request, f"Tetra AI: {response_text}")
+            voice_text = VOICE_PHRASES["products_found"]
                 
         elif agent_type == "weather_gether":
-            self.chat_display.append(f"Tetra AI: {response}\n")
+            self.replace_message(request, f"Tetra AI: {response}")
             voice_text = response
                 
         elif agent_type == "friend_chat":
-            self.chat_display.append(f"Tetra AI: {response}\n")
+            if not request.streamed:
+                self.replace_message(request, f"Tetra AI: {response}")
             voice_text = response
             
         elif agent_type == "image_analysis":
-            self.chat_display.append(f"Tetra AI: {response}\n")
-            voice_text = "Image analysis completed. Check the chat window for details."
-            
-            # Remove the image after analysis is complete
-            self.remove_image()
+            if not request.streamed:
+                self.replace_message(request, f"Tetra AI: {response}")
+            voice_text = VOICE_PHRASES["image_done"]
             
         else:
-            self.chat_display.append(f"Linux Chan: Bu tür istekleri nasıl işleyeceğimden emin değilim.\n")
-            voice_text = "Bu tür istekleri nasıl işleyeceğimden emin değilim."
+            self.replace_message(request, "Linux Chan: Bu tür istekleri nasıl işleyeceğimden emin değilim.")
+            voice_text = VOICE_PHRASES["unknown_request"]
 
-        # Only play voice if voice_active is True
+        # Remember the exchange so follow-up questions have context
+        self.memory.add_turn(USER, request.user_input)
+        self.memory.add_turn(ASSISTANT, response_text if agent_type == "e_ticaret" else str(response or voice_text))
+
+        # Only play voice if voice_active is True; speech is queued, never waited for
         if self.voice_active:
-            play_voice(
+            self.audio.speak(
                 text=voice_text,
                 volume=0.5,
                 lang=VOICE_LANG_MAP.get(language, "en")
             )
-
-        self.send_button.setEnabled(True)
         
-    def handle_error(self, error_message):
-        """Handle errors that occur during processing"""
-        self.chat_display.append(f"[Error] {error_message}\n")
-        self.send_button.setEnabled(True)
+    def handle_error(self, request_id, error_message):
+        """Show the error of a failed request in place of its answer"""
+        request = self.finish_request(request_id)
+        if request is None:
+            return
+        if request.streamed:
+            self.replace_message(request, f"\n[Error] {error_message}", append=True)
+        else:
+            self.replace_message(request, f"[Error] {error_message}")
+
+    def closeEvent(self, event):
+        """Stop speech, queued requests and their browser warm-ups when the window closes"""
+        self.scheduler.shutdown()
+        # Dropped requests never reach their agent, so quit the browsers warmed up for them here;
+        # speculations already committed to a running search are left to its scraper
+        for request in self.pending_requests.values():
+            if request.speculation:
+                request.speculation.cancel()
+        self.speculative.shutdown()
+        self.audio.shutdown()
+        self.chat_history.log.close()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon('/run/media/berkkucukk/Depo/WebDriver/tetra.png'))
-
-    # Create temp directories if they don't exist
-    os.makedirs(TEMP_VOICE_DIR, exist_ok=True)
-    os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
+    app.setWindowIcon(QIcon(ICON_FILE))
 
     try:
         window = ChatBotGUI()
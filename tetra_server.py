@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+tetra_server.py - Headless HTTP/JSON service exposing Tetra's agents
+
+Runs the same agents as the desktop window without a GUI, so one process can
+serve many users. All requests share one GeminiChatBot (response, image and
+weather caches, the async model client) and the per-agent concurrency limits;
+each session id gets its own conversation memory. When every request slot is
+busy new requests are rejected with 429 instead of queueing without bound.
+
+Usage: python tetra_server.py [--host 127.0.0.1] [--port 8765] [--language English]
+
+    POST /chat    {"message": "...", "session_id": "...", "images": ["<base64>", ...]}
+    GET  /health
+"""
+
+import sys
+import json
+import time
+import base64
+import logging
+import argparse
+import binascii
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+import tetra
+from tetra import GeminiChatBot, agent_selector, format_product_answer, run_agent
+from conversation_memory import SessionMemoryStore, USER, ASSISTANT
+from image_batch import MAX_BATCH_IMAGES
+from image_pipeline import PreparedImage, prepare_image
+from request_scheduler import AgentLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"  # Local only; put a reverse proxy in front to expose it
+DEFAULT_PORT = 8765
+MAX_CONCURRENT_REQUESTS = 8  # Requests being answered at once; more are rejected with 429
+REQUEST_TIMEOUT = 120.0  # Seconds before a request is answered with 504
+MAX_BODY_BYTES = 25 * 1024 * 1024  # Room for a batch of base64 encoded images
+RETRY_AFTER_SECONDS = 5
+DEFAULT_SESSION = "default"
+
+
+class ServerBusyError(Exception):
+    """Raised when every request slot is taken"""
+
+
+class BadRequestError(ValueError):
+    """Raised when a request body is malformed"""
+
+
+class AgentService:
+    """Answers chat messages with the agents, sharing resources between concurrent requests"""
+
+    def __init__(self, chat_bot: Optional[GeminiChatBot] = None,
+                 max_concurrent: int = MAX_CONCURRENT_REQUESTS, timeout: float = REQUEST_TIMEOUT):
+        self.chat_bot = chat_bot if chat_bot is not None else GeminiChatBot()
+        self.memories = SessionMemoryStore(self.chat_bot)
+        self.limiter = AgentLimiter()
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        # A slot is held until the agent really finishes, even after its client got a 504
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="agent")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def chat(self, message: str, session_id: str = DEFAULT_SESSION,
+             images: Optional[List[PreparedImage]] = None) -> dict:
+        """
+        Answer a message on behalf of a session
+
+        Raises:
+            ServerBusyError: If MAX_CONCURRENT_REQUESTS requests are already running
+            TimeoutError: If the answer is not ready within the request timeout
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServerBusyError("Too many requests in progress, try again later")
+        with self._lock:
+            self._active += 1
+        request_id = next(self._ids)
+        try:
+            future = self._executor.submit(self._answer, request_id, message, session_id, images or [])
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Request {request_id} timed out after {self.timeout:g}s")
+            raise TimeoutError(f"No answer within {self.timeout:g} seconds")
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _answer(self, request_id: int, message: str, session_id: str, images: List[PreparedImage]) -> dict:
+        start = time.perf_counter()
+        memory = self.memories.get(session_id)
+        agent_type = agent_selector(self.chat_bot, message, bool(images), memory)
+        with self.limiter.slot(agent_type):
+            # No speculative browser and no product page opened on the server
+            result = run_agent(self.chat_bot, agent_type, message, images, None, memory, open_product=False)
+
+        response = {"request_id": request_id, "agent": agent_type}
+        if agent_type == "e_ticaret":
+            products, selected_id = result
+            answer = format_product_answer(products, selected_id)
+            response.update(products=products or {}, selected_product=selected_id)
+        elif result is None:
+            answer = "Bu tür istekleri nasıl işleyeceğimden emin değilim."
+        else:
+            answer = str(result)
+        response["answer"] = answer
+
+        memory.add_turn(USER, message)
+        memory.add_turn(ASSISTANT, answer)
+        logger.info(f"Request {request_id} ({agent_type}, session {session_id}) answered in "
+                    f"{time.perf_counter() - start:.1f}s")
+        return response
+
+    def health(self) -> dict:
+        with self._lock:
+            active = self._active
+        return {"status": "ok", "active_requests": active, "max_concurrent": self.max_concurrent,
+                "agents_running": self.limiter.in_flight()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_chat_request(body: bytes) -> Tuple[str, str, List[PreparedImage]]:
+    """Validate a /chat body and return (message, session id, prepared images)"""
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise BadRequestError(f"Body is not valid JSON: {e}") from e
+    if not isinstance(payload, dict):
+        raise BadRequestError("Body must be a JSON object")
+
+    message = payload.get("message", "")
+    session_id = payload.get("session_id") or DEFAULT_SESSION
+    encoded_images = payload.get("images") or []
+    if not isinstance(message, str) or not isinstance(session_id, str) or not isinstance(encoded_images, list):
+        raise BadRequestError("message and session_id must be strings, images a list")
+    if not message.strip() and not encoded_images:
+        raise BadRequestError("Send a message or at least one image")
+    if len(encoded_images) > MAX_BATCH_IMAGES:
+        raise BadRequestError(f"At most {MAX_BATCH_IMAGES} images per request")
+
+    images = []
+    for position, encoded in enumerate(encoded_images, 1):
+        try:
+            images.append(prepare_image(base64.b64decode(encoded, validate=True)))
+        except (TypeError, ValueError, binascii.Error) as e:
+            raise BadRequestError(f"Image {position} could not be read: {e}") from e
+    return message.strip(), session_id, images
+
+
+class TetraRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over the AgentService of the server"""
+
+    server_version = "Tetra/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/chat":
+            self._send_json(404, {"error": "Not found"})
+            return
+        header = self.headers.get("Content-Length")
+        if header is None:
+            self.close_connection = True
+            self._send_json(411, {"error": "Content-Length header required"})
+            return
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be delimited, so the connection is not reused
+            self.close_connection = True
+            self._send_json(400, {"error": f"Invalid Content-Length: {header}"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"})
+            return
+
+        try:
+            message, session_id, images = parse_chat_request(self.rfile.read(length))
+            self._send_json(200, self.server.service.chat(message, session_id, images))
+        except BadRequestError as e:
+            self._send_json(400, {"error": str(e)})
+        except ServerBusyError as e:
+            self._send_json(429, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        except TimeoutError as e:
+            self._send_json(504, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error answering request: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+
+class TetraServer(ThreadingHTTPServer):
+    """Threaded HTTP server; every connection gets a thread, the service bounds the real work"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: AgentService):
+        super().__init__(address, TetraRequestHandler)
+        self.service = service
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve Tetra's agents over a local HTTP/JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--language", default="English", choices=list(tetra.VOICE_LANG_MAP),
+                        help="Language the agents answer in")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="Seconds per request")
+    args = parser.parse_args()
+
+    # The agents read the answer language from this module-wide setting
+    tetra.language = args.language
+    try:
+        service = AgentService(max_concurrent=args.max_concurrent, timeout=args.timeout)
+    except Exception as e:
+        logger.critical(f"Failed to initialize chat bot: {e}")
+        return 1
+
+    server = TetraServer((args.host, args.port), service)
+    logger.info(f"Tetra server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+tts_backends.py - Text-to-speech engines selectable per language
+
+gTTS synthesizes through Google's online service; espeak-ng runs locally and
+keeps working offline. The router picks the configured backend for each
+language, falls back to the other one when it fails and measures the latency
+of every backend.
+"""
+
+import io
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTS_BACKEND = "gtts"
+# Language code -> backend name, for languages that should not use the default
+TTS_BACKEND_BY_LANG: Dict[str, str] = {}
+GTTS_TIMEOUT = 10
+LOCAL_TTS_TIMEOUT = 20
+BACKEND_COOLDOWN = 60  # Seconds a failed backend is tried only after the others
+ESPEAK_SPEED = 165  # Words per minute
+
+
+class TTSBackend(ABC):
+    """A speech engine turning text into playable audio bytes (MP3 or WAV)"""
+
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    def voice(self, lang: str) -> str:
+        """Identify the backend and settings that shape the audio, for the clip cache key"""
+        return self.name
+
+    @abstractmethod
+    def synthesize(self, text: str, lang: str) -> bytes:
+        """Return the spoken text as audio bytes"""
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech over the network; returns MP3"""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang, timeout=GTTS_TIMEOUT).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class EspeakBackend(TTSBackend):
+    """Local espeak-ng (or espeak) synthesis; returns WAV"""
+
+    name = "espeak-ng"
+
+    def __init__(self, speed: int = ESPEAK_SPEED):
+        self.speed = speed
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self) -> bool:
+        return self.executable is not None
+
+    def voice(self, lang: str) -> str:
+        return f"{self.name}:{lang}:{self.speed}"
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        if self.executable is None:
+            raise RuntimeError("espeak-ng is not installed")
+        result = subprocess.run(
+            [self.executable, "-v", lang, "-s", str(self.speed), "--stdout"],
+            input=text.encode("utf-8"), capture_output=True, timeout=LOCAL_TTS_TIMEOUT, check=True
+        )
+        return result.stdout
+
+
+class TTSRouter:
+    """Chooses a backend per language, falls back on failure and tracks per-backend latency"""
+
+    def __init__(self, backends: Optional[List[TTSBackend]] = None,
+                 default: str = DEFAULT_TTS_BACKEND, by_lang: Optional[Dict[str, str]] = None):
+        backends = backends if backends is not None else [GTTSBackend(), EspeakBackend()]
+        self.backends = {backend.name: backend for backend in backends if backend.available()}
+        self.default = default
+        self.by_lang = dict(TTS_BACKEND_BY_LANG if by_lang is None else by_lang)
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Dict[str, float]] = {}
+        self._down_until: Dict[str, float] = {}
+        logger.info(f"TTS backends available: {', '.join(self.backends) or 'none'}")
+
+    def _order(self, lang: str) -> List[TTSBackend]:
+        """The configured backend for lang first, then the others; recently failed ones go last"""
+        preferred = self.by_lang.get(lang, self.default)
+        names = [name for name in [preferred] + list(self.backends) if name in self.backends]
+        names = list(dict.fromkeys(names))
+        now = time.monotonic()
+        with self._lock:
+            # Stable sort keeps the configured order among healthy and among failed backends
+            names.sort(key=lambda name: self._down_until.get(name, 0) > now)
+        return [self.backends[name] for name in names]
+
+    def voice(self, lang: str) -> str:
+        """Voice of the backend that will be tried first for lang"""
+        order = self._order(lang)
+        return order[0].voice(lang) if order else "none"
+
+    def synthesize(self, text: str, lang: str) -> Tuple[bytes, str]:
+        """
+        Synthesize text with the first backend that succeeds
+
+        Returns:
+            tuple: (audio bytes, voice of the backend that produced them)
+
+        Raises:
+            RuntimeError: If every backend failed
+        """
+        errors = []
+        for backend in self._order(lang):
+            start = time.perf_counter()
+            try:
+                audio = backend.synthesize(text, lang)
+            except Exception as e:
+                self._record(backend.name, time.perf_counter() - start, failed=True)
+                logger.warning(f"TTS backend {backend.name} failed: {e}")
+                errors.append(f"{backend.name}: {e}")
+                continue
+            self._record(backend.name, time.perf_counter() - start)
+            return audio, backend.voice(lang)
+        raise RuntimeError(f"All TTS backends failed ({'; '.join(errors) or 'none available'})")
+
+    def _record(self, name: str, seconds: float, failed: bool = False):
+        with self._lock:
+            stats = self._latency.setdefault(name, {"calls": 0, "errors": 0, "total_ms": 0.0, "last_ms": 0.0})
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += seconds * 1000
+            stats["last_ms"] = seconds * 1000
+            if failed:
+                self._down_until[name] = time.monotonic() + BACKEND_COOLDOWN
+            else:
+                self._down_until.pop(name, None)
+        logger.info(f"TTS {name} took {seconds * 1000:.0f} ms{' (failed)' if failed else ''}")
+
+    def latency(self) -> Dict[str, Dict[str, float]]:
+        """Return calls, errors, mean and last latency in milliseconds per backend"""
+        with self._lock:
+            return {
+                name: {"calls": stats["calls"], "errors": stats["errors"],
+                       "mean_ms": stats["total_ms"] / stats["calls"], "last_ms": stats["last_ms"]}
+                for name, stats in self._latency.items()
+            }
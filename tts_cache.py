@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+tts_cache.py - Disk-backed cache of synthesized speech clips
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+from llm_cache import CACHE_DIR, hash_text
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_FILE = os.path.join(CACHE_DIR, "tts_clips.sqlite3")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB of MP3/WAV clips
+
+
+def make_clip_key(text: str, lang: str, voice: str = "gtts") -> str:
+    """
+    Build the cache key of a clip
+
+    Args:
+        text: The spoken text
+        lang: Language code the text is spoken in
+        voice: Backend and voice settings that change the audio (TTSBackend.voice)
+    """
+    return hash_text("\x1f".join([voice, lang, text.strip()]))
+
+
+class ClipCache:
+    """SQLite store of audio clips with a size cap and LRU eviction"""
+
+    def __init__(self, path: str = TTS_CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # Used by the audio thread and the pre-warm thread
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS clips (
+                key TEXT PRIMARY KEY,
+                audio BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_clip_last_access ON clips(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the clip for key, or None on a miss"""
+        with self._lock:
+            row = self._conn.execute("SELECT audio FROM clips WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE clips SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return bytes(row[0])
+
+    def contains(self, key: str) -> bool:
+        """Whether a clip is stored, without touching its LRU position or the counters"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM clips WHERE key = ?", (key,)).fetchone() is not None
+
+    def set(self, key: str, audio: bytes):
+        """Store a clip and evict the least recently used ones past max_bytes"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO clips (key, audio, last_access, size) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(audio), time.time(), len(audio))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM clips ORDER BY last_access ASC").fetchall():
+            if total_size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM clips WHERE key = ?", (key,))
+            total_size -= size
+            removed += 1
+        logger.info(f"TTS cache evicted {removed} clips")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+weather_client.py - WeatherAPI.com client with a pooled session, TTL cache and request coalescing
+"""
+
+import time
+import logging
+import threading
+import unicodedata
+from concurrent.futures import Future
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+WEATHER_API_URL = "https://api.weatherapi.com/v1/forecast.json"
+WEATHER_CACHE_TTL = 10 * 60  # Seconds a forecast is answered locally
+WEATHER_TIMEOUT = 10
+MAX_FORECAST_DAYS = 3  # Days the free WeatherAPI plan returns
+POOL_SIZE = 8
+
+
+def normalize_city(name: str) -> str:
+    """Casefold a city name and strip diacritics so "İstanbul", "istanbul" and "Istanbul" match"""
+    text = unicodedata.normalize("NFKD", (name or "").strip().casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    # The dotless ı has no decomposition; Turkish users often type it for i
+    return " ".join(text.replace("ı", "i").split())
+
+
+class WeatherClient:
+    """Forecast lookups sharing one HTTP session, cached per city and language"""
+
+    def __init__(self, api_key: str, ttl: float = WEATHER_CACHE_TTL, timeout: float = WEATHER_TIMEOUT):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        # requests is imported with the first weather question, not at startup
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        # (city, lang) -> (fetched at, days, response); a longer forecast answers shorter ones
+        self._cache: Dict[Tuple[str, str], Tuple[float, int, dict]] = {}
+        self._in_flight: Dict[Tuple[str, str], Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def forecast(self, city: str, days: int = 1, lang: str = "en") -> dict:
+        """
+        Return WeatherAPI's forecast.json response for a city
+
+        Args:
+            city: City name as written by the user
+            days: Forecast days to include, 1 to MAX_FORECAST_DAYS
+            lang: Language code for the condition texts
+
+        Returns:
+            dict: The decoded JSON response
+
+        Raises:
+            requests.RequestException: If the upstream call fails
+        """
+        days = max(1, min(days, MAX_FORECAST_DAYS))
+        key = (normalize_city(city), lang)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] <= self.ttl and cached[1] >= days:
+                self.metrics["hits"] += 1
+                logger.info(f"Weather cache hit for {city}")
+                return cached[2]
+
+            # Concurrent asks for the same city wait on the call already in flight
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None and in_flight[0] >= days:
+                self.metrics["coalesced"] += 1
+                future = in_flight[1]
+                owner = False
+            else:
+                self.metrics["misses"] += 1
+                future = Future()
+                self._in_flight[key] = (days, future)
+                owner = True
+
+        if not owner:
+            return future.result(timeout=self.timeout * 2)
+
+        try:
+            data = self._fetch(city, days, lang)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            with self._lock:
+                self._cache[key] = (time.monotonic(), days, data)
+                self._evict()
+            future.set_result(data)
+            return data
+        finally:
+            with self._lock:
+                if self._in_flight.get(key, (None, None))[1] is future:
+                    del self._in_flight[key]
+
+    def _fetch(self, city: str, days: int, lang: str) -> dict:
+        params = {"key": self.api_key, "q": city, "days": days}
+        if lang != "en":
+            params["lang"] = lang
+        response = self.session.get(WEATHER_API_URL, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _evict(self):
+        """Drop expired forecasts"""
+        now = time.monotonic()
+        for key in [key for key, entry in self._cache.items() if now - entry[0] > self.ttl]:
+            del self._cache[key]
+
+    def close(self):
+        self.session.close()
+
+
+def format_current(data: dict) -> str:
+    """Render the current conditions of a forecast response as one line"""
+    location_name = data["location"]["name"]
+    current_temp = data["current"]["temp_c"]
+    current_weather = data["current"]["condition"]["text"]
+    return f"Location: {location_name}, Temperature: {current_temp}°C, Weather: {current_weather}"
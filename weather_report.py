@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+weather_report.py - Multi-city, multi-day weather answers
+
+The forecast horizon is read from the message, the forecasts of all cities are
+fetched concurrently over the shared weather client and rendered as a compact
+comparison.
+"""
+
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from weather_client import MAX_FORECAST_DAYS, WeatherClient, format_current, normalize_city
+
+logger = logging.getLogger(__name__)
+
+MAX_CITIES = 6  # Cities answered per message
+MAX_CONCURRENT_FETCHES = 4
+
+# "3 gün", "5 days", "2 días", "4 Tage", "3 jours", "3 дня"
+DAY_COUNT_PATTERN = re.compile(r"\b(\d{1,2})[\s-]*(?:gun|day|dia|tag|jour|дн|ден|дня)", re.IGNORECASE)
+
+# Phrases (regular expressions) implying a horizon, checked in order so "day after tomorrow"
+# wins over "tomorrow". Matched against normalize_city output, so without diacritics and
+# with single spaces; German "heute morgen" is this morning, not tomorrow.
+HORIZON_PHRASES = [
+    (3, ["obur gun", "ertesi gun", "day after tomorrow", "pasado manana", "ubermorgen",
+         "apres-demain", "apres demain", "послезавтра"]),
+    (MAX_FORECAST_DAYS, ["hafta", "week", "semana", "woche", "semaine", "недел", "выходн"]),
+    (2, ["yarin", "tomorrow", "manana", "(?<!heute )morgen", "demain", "завтра"]),
+]
+
+
+def forecast_horizon(text: str) -> int:
+    """Return how many forecast days (today included) a message asks for, 1 to MAX_FORECAST_DAYS"""
+    normalized = normalize_city(text)
+    match = DAY_COUNT_PATTERN.search(normalized)
+    if match:
+        return max(1, min(int(match.group(1)), MAX_FORECAST_DAYS))
+    for days, phrases in HORIZON_PHRASES:
+        if any(re.search(phrase, normalized) for phrase in phrases):
+            return days
+    return 1
+
+
+def fetch_forecasts(client: WeatherClient, cities: List[str], days: int, lang: str = "en",
+                    concurrency: int = MAX_CONCURRENT_FETCHES) -> List[Tuple[str, Optional[dict], Optional[str]]]:
+    """
+    Fetch the forecasts of several cities at once
+
+    Returns:
+        list: (city, forecast response or None, error message or None), in the order of cities
+    """
+    def fetch(city: str) -> Tuple[str, Optional[dict], Optional[str]]:
+        try:
+            return city, client.forecast(city, days=days, lang=lang), None
+        except Exception as e:
+            logger.error(f"Weather API error for {city}: {e}")
+            return city, None, str(e)
+
+    if len(cities) == 1:
+        return [fetch(cities[0])]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(cities))) as executor:
+        return list(executor.map(fetch, cities))
+
+
+def format_days(data: dict, days: int) -> List[str]:
+    """Render one line per forecast day: date, min-max temperature, condition and chance of rain"""
+    lines = []
+    for forecast_day in data.get("forecast", {}).get("forecastday", [])[:days]:
+        day = forecast_day["day"]
+        lines.append(f"  {forecast_day['date']}: {day['mintemp_c']:.0f}-{day['maxtemp_c']:.0f}°C, "
+                     f"{day['condition']['text']}, rain {day.get('daily_chance_of_rain', 0)}%")
+    return lines
+
+
+def format_comparison(results: List[Tuple[str, Optional[dict], Optional[str]]], days: int) -> str:
+    """Render the forecasts of several cities, one block per city"""
+    lines = []
+    for city, data, error in results:
+        if data is None:
+            lines.append(f"Location: {city}, Error: {error}")
+            continue
+        lines.append(format_current(data))
+        if days > 1:
+            lines.extend(format_days(data, days))
+    return "\n".join(lines)